@@ -15,10 +15,9 @@ It does NOT have access to workspace files - that's handled by workspace_router.
 """
 
 import logging
-import os
-from typing import Optional, Dict, List
-from datetime import datetime, timedelta
-import threading
+import uuid as uuid_lib
+from typing import Optional
+from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from pydantic import BaseModel, Field
@@ -26,6 +25,7 @@ from google import genai
 from google.genai import types
 
 from app.services.academic_service import AcademicService
+from app.services.conversation_memory import ConversationMemory
 from app.features.audio_processor import process_audio_input
 from app.services.gemini_engine import GeminiEngine
 from backend_config import MODEL_NAME
@@ -38,49 +38,8 @@ logger = logging.getLogger(__name__)
 # Conversation Memory (Assistant-Specific)
 # =============================================================================
 
-class AssistantMemory:
-    """In-memory conversation storage with 24-hour TTL per user."""
-    
-    def __init__(self, ttl_hours: int = 24):
-        self._store: Dict[str, Dict] = {}
-        self._lock = threading.Lock()
-        self._ttl = timedelta(hours=ttl_hours)
-    
-    def _cleanup_expired(self):
-        now = datetime.now()
-        expired = [uid for uid, data in self._store.items() 
-                   if now - data['last_access'] > self._ttl]
-        for uid in expired:
-            del self._store[uid]
-    
-    def add_message(self, user_id: str, role: str, content: str):
-        with self._lock:
-            self._cleanup_expired()
-            if user_id not in self._store:
-                self._store[user_id] = {'messages': [], 'last_access': datetime.now()}
-            
-            self._store[user_id]['messages'].append({
-                'role': role,
-                'content': content,
-                'timestamp': datetime.now().isoformat()
-            })
-            self._store[user_id]['last_access'] = datetime.now()
-            
-            # Keep only last 20 messages
-            if len(self._store[user_id]['messages']) > 20:
-                self._store[user_id]['messages'] = self._store[user_id]['messages'][-20:]
-    
-    def get_history(self, user_id: str) -> List[Dict]:
-        with self._lock:
-            self._cleanup_expired()
-            if user_id in self._store:
-                self._store[user_id]['last_access'] = datetime.now()
-                return self._store[user_id]['messages'].copy()
-            return []
-
-
 # Singleton memory instance for this router
-assistant_memory = AssistantMemory(ttl_hours=24)
+assistant_memory = ConversationMemory(ttl_hours=24)
 
 
 # =============================================================================
@@ -111,7 +70,6 @@ def resolve_user_uuid(user_id: str) -> Optional[str]:
     if not user_id or user_id == "anonymous":
         return None
     try:
-        import uuid as uuid_lib
         uuid_lib.UUID(user_id)
         return user_id
     except ValueError:
@@ -195,10 +153,10 @@ async def assistant_chat(
             messages.append(f"Today's Date: {datetime.now().strftime('%A, %B %d, %Y')}")
         
         # 3. Add Conversation History
-        history = assistant_memory.get_history(user_id)
-        for msg in history[-10:]:
-            role = "User" if msg['role'] == 'user' else "Ayla"
-            messages.append(f"{role}: {msg['content']}")
+        history_count = assistant_memory.message_count(user_id)
+        transcript = assistant_memory.get_transcript(user_id, 10)
+        if transcript:
+            messages.append(transcript)
         
         # 4. Add Current Message
         messages.append(f"User: {request.message}")
@@ -227,7 +185,7 @@ async def assistant_chat(
             "result": answer,
             "model": MODEL_NAME,
             "user_id": user_id,
-            "history_count": len(history) + 2
+            "history_count": history_count + 2
         }
         
     except Exception as e:
@@ -1,5 +1,6 @@
 import logging
 import os
+import uuid as uuid_lib
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
@@ -73,7 +74,6 @@ async def chat_with_audio(
         
         # Robust UUID resolution
         try:
-            import uuid as uuid_lib
             uuid_lib.UUID(user_id)
             user_uuid = user_id
         except:
@@ -5,14 +5,32 @@ This module maps degree subjects to their corresponding Modulhandbuch URLs
 at TU Dortmund faculty websites.
 """
 
+import asyncio
 import logging
 import re
-import requests
-from bs4 import BeautifulSoup
+import httpx
+from lxml import etree, html
+from functools import lru_cache
 from typing import Dict, Optional, List
 
+from app.utils.ttl_cache import ExpiringCache
+
 logger = logging.getLogger(__name__)
 
+# PDF links (case-insensitive ".pdf" in href) and any link with an href, selected in C by lxml
+_PDF_LINKS_XPATH = etree.XPath("//a[contains(translate(@href, 'PDF', 'pdf'), '.pdf')]")
+_ALL_LINKS_XPATH = etree.XPath("//a[@href]")
+_TEXT_NODES_XPATH = etree.XPath(".//text()")
+
+
+def _link_text(link) -> str:
+    """Text of an <a> element with each text node stripped and joined, like BeautifulSoup's get_text(strip=True)."""
+    return "".join(t.strip() for t in _TEXT_NODES_XPATH(link))
+
+# Discovered PDF lists per (page_url, po_version, patterns); the faculty pages change a few times a year
+PDF_URLS_CACHE_TTL = 6 * 3600  # 6 hours
+_pdf_urls_cache = ExpiringCache(maxsize=64, ttl=PDF_URLS_CACHE_TTL)
+
 # Knowledge Map: Degree subject to Modulhandbuch URL routing
 MODULHANDBUCH_ROUTES = {
     # Informatik Faculty (cs.tu-dortmund.de)
@@ -88,8 +106,10 @@ class ModulhandbuchRouter:
         # Normalize subject name
         self.normalized_subject = self._normalize_subject(self.degree_subject)
         
-    def _normalize_subject(self, subject: str) -> str:
-        """Normalize subject name to match routing table."""
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _normalize_subject(subject: str) -> str:
+        """Normalize subject name to match routing table (memoized; there are only a handful of subjects)."""
         if not subject:
             return ""
             
@@ -141,11 +161,31 @@ class ModulhandbuchRouter:
         
         return f"{base_url}{path}"
     
-    def fetch_pdf_urls(self) -> List[Dict]:
+    def _details_page_url(self, route: Dict) -> Optional[str]:
+        """
+        URL of the configured details page, if it belongs to this exact degree.
+        
+        The configured pages are all bachelor pages, and some routes point at a
+        sibling programme's page (Informatik uses the AngInf one), so the page is
+        only used for bachelor students whose own programme slug appears in it.
+        """
+        details_page = route.get('mhb_details_page')
+        if not details_page or (self.degree_type and 'Master' in self.degree_type):
+            return None
+        slug = route.get('bachelor_path', '').strip('/')  # e.g. "bsc-wirtinf"
+        if not slug or not re.search(rf'/{re.escape(slug)}(?:[-/]|$)', details_page):
+            return None
+        return f"{route['base_url']}{details_page}"
+    
+    async def fetch_pdf_urls(self) -> List[Dict]:
         """
         Fetch list of Modulhandbuch PDF URLs from the faculty website.
         Handles intermediate pages by following links if no PDFs found initially.
         
+        The configured details page (route['mhb_details_page']) is requested
+        alongside the landing page when it matches the degree (see
+        _details_page_url), so the usual two-hop case costs one round-trip.
+        
         Returns:
             List of dicts: [{'name': 'MHB Teil 1', 'url': '...', 'po_match': True}]
         """
@@ -153,24 +193,40 @@ class ModulhandbuchRouter:
         if not page_url:
             return []
         
+        route = self.get_route()
+        cache_key = (page_url, self.po_version, tuple(route.get('pdf_patterns', ['Modulhandbuch'])))
+        cached = _pdf_urls_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        details_url = self._details_page_url(route)
+        
         try:
-            logger.info(f"Fetching Modulhandbuch page: {page_url}")
-            response = requests.get(page_url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Helper to extract PDFs from a soup object
-            def extract_from_soup(current_soup, source_url):
-                pdf_links = []
-                route = self.get_route()
-                patterns = route.get('pdf_patterns', ['Modulhandbuch'])
+            async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as client:
+                logger.info(f"Fetching Modulhandbuch page: {page_url}")
+                pending = [client.get(page_url)]
+                if details_url:
+                    pending.append(client.get(details_url))
+                responses = await asyncio.gather(*pending, return_exceptions=True)
+                
+                response = responses[0]
+                if isinstance(response, BaseException):
+                    raise response
+                response.raise_for_status()
                 
-                for link in current_soup.find_all('a', href=True):
-                    href = link['href']
-                    text = link.get_text(strip=True)
+                # lxml parses in C and sniffs the encoding from the raw bytes
+                tree = html.fromstring(response.content)
+                
+                # Helper to extract PDFs from a parsed page
+                def extract_from_tree(current_tree, source_url):
+                    pdf_links = []
+                    patterns = route.get('pdf_patterns', ['Modulhandbuch'])
                     
-                    if '.pdf' in href.lower():
+                    # Only PDF links are visited; the XPath translate() matches .PDF as well
+                    for link in _PDF_LINKS_XPATH(current_tree):
+                        href = link.get('href')
+                        text = _link_text(link)
+                        
                         is_mhb = any(p.lower() in text.lower() or p.lower() in href.lower() 
                                      for p in patterns)
                         
@@ -193,49 +249,60 @@ class ModulhandbuchRouter:
                                 'url': href,
                                 'po_match': po_match
                             })
-                return pdf_links
+                    return pdf_links
 
-            # Attempt 1: Look on current page
-            pdf_links = extract_from_soup(soup, page_url)
-            
-            if not pdf_links:
-                logger.info("No PDFs found on landing page. Looking for sub-page links...")
-                # Attempt 2: Look for a link to the "Details" or "Modulhandbuch" page
-                # The debug structure showed a tile link with "Modulhandbuch" text or inside 'details' path
+                # Attempt 1: Look on current page
+                pdf_links = extract_from_tree(tree, page_url)
                 
-                sub_page_url = None
-                for link in soup.find_all('a', href=True):
-                    href = link['href']
-                    text = link.get_text(strip=True)
+                if not pdf_links and details_url:
+                    # Attempt 2: The configured details page, already fetched in parallel
+                    details_response = responses[1]
+                    if not isinstance(details_response, BaseException) and details_response.status_code == 200:
+                        logger.info(f"Using prefetched details page: {details_url}")
+                        pdf_links = extract_from_tree(html.fromstring(details_response.content), details_url)
+                
+                if not pdf_links:
+                    logger.info("No PDFs found on landing page. Looking for sub-page links...")
+                    # Attempt 3: Look for a link to the "Details" or "Modulhandbuch" page
+                    # The debug structure showed a tile link with "Modulhandbuch" text or inside 'details' path
                     
-                    # Heuristics for the sub-page link
-                    if "modulhandbuch" in text.lower() or "details" in href.lower():
-                        if "bsc" in href.lower() or "msc" in href.lower():
-                             # Prioritize the one matching our degree type if possible
-                             current_path = self.get_route().get('bachelor_path', '')
-                             if current_path.strip('/') in href:
-                                 pass # reinforcing match
+                    sub_page_url = None
+                    for link in _ALL_LINKS_XPATH(tree):
+                        href = link.get('href')
+                        text = _link_text(link)
+                        
+                        # Heuristics for the sub-page link
+                        if "modulhandbuch" in text.lower() or "details" in href.lower():
+                            if "bsc" in href.lower() or "msc" in href.lower():
+                                 # Prioritize the one matching our degree type if possible
+                                 current_path = route.get('bachelor_path', '')
+                                 if current_path.strip('/') in href:
+                                     pass # reinforcing match
 
-                             sub_page_url = href
-                             if not sub_page_url.startswith('http'):
-                                 sub_page_url = f"https://cs.tu-dortmund.de{sub_page_url}"
-                             break
-                
-                if sub_page_url:
-                    logger.info(f"Following sub-page link: {sub_page_url}")
-                    sub_response = requests.get(sub_page_url, timeout=10)
-                    if sub_response.status_code == 200:
-                         sub_soup = BeautifulSoup(sub_response.text, 'html.parser')
-                         pdf_links = extract_from_soup(sub_soup, sub_page_url)
+                                 sub_page_url = href
+                                 if not sub_page_url.startswith('http'):
+                                     sub_page_url = f"https://cs.tu-dortmund.de{sub_page_url}"
+                                 break
+                    
+                    # The prefetched details page was already searched above
+                    if sub_page_url and sub_page_url != details_url:
+                        logger.info(f"Following sub-page link: {sub_page_url}")
+                        sub_response = await client.get(sub_page_url)
+                        if sub_response.status_code == 200:
+                             sub_tree = html.fromstring(sub_response.content)
+                             pdf_links = extract_from_tree(sub_tree, sub_page_url)
             
             logger.info(f"Found {len(pdf_links)} Modulhandbuch PDFs")
+            # Empty results and errors aren't cached, so the next call retries the page
+            if pdf_links:
+                _pdf_urls_cache[cache_key] = pdf_links
             return pdf_links
             
         except Exception as e:
             logger.error(f"Error fetching Modulhandbuch page: {e}")
             return []
     
-    def get_best_pdf_url(self) -> Optional[str]:
+    async def get_best_pdf_url(self, pdfs: Optional[List[Dict]] = None) -> Optional[str]:
         """
         Get the best matching Modulhandbuch PDF URL.
         
@@ -244,6 +311,9 @@ class ModulhandbuchRouter:
         2. PDF matching PO version from dynamic discovery
         3. First available PDF from dynamic discovery
         
+        Args:
+            pdfs: Result of fetch_pdf_urls() if the caller already has it
+        
         Returns:
             URL string or None
         """
@@ -254,7 +324,8 @@ class ModulhandbuchRouter:
             return route['pdf_url']
         
         # Priority 2 & 3: Dynamic discovery
-        pdfs = self.fetch_pdf_urls()
+        if pdfs is None:
+            pdfs = await self.fetch_pdf_urls()
         
         if not pdfs:
             return None
@@ -268,7 +339,7 @@ class ModulhandbuchRouter:
         return pdfs[0]['url']
 
 
-def get_modulhandbuch_for_degree(degree_identity: Dict) -> Dict:
+async def get_modulhandbuch_for_degree(degree_identity: Dict) -> Dict:
     """
     Main entry point: Get Modulhandbuch info for a degree identity.
     
@@ -297,11 +368,11 @@ def get_modulhandbuch_for_degree(degree_identity: Dict) -> Dict:
     }
     
     # Get PDF list from dynamic discovery (for display purposes)
-    pdf_list = router.fetch_pdf_urls()
+    pdf_list = await router.fetch_pdf_urls()
     result['pdf_list'] = pdf_list
     
-    # Get best PDF URL (checks config first, then dynamic list)
-    best_url = router.get_best_pdf_url()
+    # Get best PDF URL (checks config first, then the list fetched above)
+    best_url = await router.get_best_pdf_url(pdfs=pdf_list)
     if best_url:
         result['success'] = True
         result['pdf_url'] = best_url
@@ -1,6 +1,7 @@
 import logging
 import json
 import asyncio
+import uuid as uuid_lib
 from datetime import datetime
 from typing import AsyncGenerator, Optional
 
@@ -69,7 +70,6 @@ async def stream_chat(
                 
                 # Robust UUID resolution
                 try:
-                    import uuid as uuid_lib
                     uuid_lib.UUID(user_id)
                     user_uuid = user_id
                 except:
@@ -12,6 +12,7 @@ import os
 import uuid
 import logging
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional, List
 
 from fastapi import APIRouter, HTTPException, UploadFile, File as FastAPIFile, Form
@@ -28,11 +29,11 @@ from backend_config import MODEL_NAME
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=4096)
 def username_to_uuid(username: str) -> str:
     """Generate a deterministic UUID from a username string."""
     # Use UUID5 with a namespace to get consistent UUIDs for the same username
-    namespace = uuid.UUID('6ba7b810-9dad-11d1-80b4-00c04fd430c8')  # DNS namespace
-    return str(uuid.uuid5(namespace, username))
+    return str(uuid.uuid5(uuid.NAMESPACE_DNS, username))
 
 def resolve_user_id(identifier: str) -> str:
     """
@@ -1,14 +1,26 @@
+import asyncio
+import base64
+import concurrent.futures
+import hashlib
 import logging
+import re
+import tempfile
+import threading
 import time
 import pyotp
 import json
+from urllib.parse import urlsplit
+from collections import OrderedDict
 from datetime import datetime
 from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from bs4 import BeautifulSoup
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+from cryptography.fernet import Fernet, InvalidToken
+from lxml import etree, html
 import httpx
 
 
@@ -20,17 +32,197 @@ from app.utils.webdriver_utils import get_cached_driver_path, DEBUG_DIR
 
 logger = logging.getLogger(__name__)
 
+BOSS_URL = "https://www.boss.tu-dortmund.de/"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+# Chrome is launched with USER_AGENT too, so httpx requests look like the browser session
+HTTP_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Upgrade-Insecure-Requests": "1"
+}
+
+# Created once per process instead of on every scraper instantiation
+BOSS_SESSION_DIR = os.path.join(DEBUG_DIR, "boss_session")
+os.makedirs(BOSS_SESSION_DIR, exist_ok=True)
+
+CHROME_PERF_FLAGS = [
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-breakpad",
+    "--disable-client-side-phishing-detection",
+    "--disable-component-extensions-with-background-pages",
+    "--disable-default-apps",
+    "--disable-extensions",
+    "--disable-features=TranslateUI,BlinkGenPropertyTrees",
+    "--disable-hang-monitor",
+    "--disable-ipc-flooding-protection",
+    "--disable-popup-blocking",
+    "--disable-prompt-on-repost",
+    "--disable-renderer-backgrounding",
+    "--disable-sync",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--hide-scrollbars",
+]
+
+# Subresources the scraper never needs; blocked via CDP before Chrome issues the request
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.css", "*.mp4",
+    "*/analytics/*", "*google-analytics*", "*googletagmanager*", "*matomo*",
+]
+
+# Post-login page markers, matched in a single pass over the page source
+_RE_LOGIN_FAILED = re.compile(r'login failed|fehlgeschlagen', re.IGNORECASE)
+_RE_2FA = re.compile(r'one-time password|second factor|zweiter faktor|sicherheitstoken|security token', re.IGNORECASE)
+
+# Step 3 wait condition as one script round trip: bit 0 = back on a known host, bit 1 = error text
+_JS_LOGIN_OUTCOME = (
+    "var h = window.location.href;"
+    "var f = (h.indexOf('sso.itmc') !== -1 || h.indexOf('boss.tu-dortmund.de') !== -1) ? 1 : 0;"
+    "if (!f && document.body) {"
+    "  var t = document.body.innerText.toLowerCase();"
+    "  if (t.indexOf('error') !== -1 || t.indexOf('fehlgeschlagen') !== -1) { f |= 2; }"
+    "}"
+    "return f;"
+)
+
+# Degree identity patterns
+_RE_ABSCHLUSS = re.compile(r'Abschluss:\[(\d+)\]\s*([^S]+)', re.IGNORECASE)
+_RE_STUDIENGANG = re.compile(r'Studiengang:\[([A-Z]\d+)\]\s*(.+?)(?:\(|$)', re.IGNORECASE)
+_RE_ABSCHLUSS_TEXT = re.compile(r'Abschluss\s+(\d+)\s+(Bachelor|Master)', re.IGNORECASE)
+_RE_PO = re.compile(r'(.+?)\s*\(PO-Version\s+(\d+)\)')
+
+# The grade table is the innermost table whose header mentions exams or credits
+GRADE_TABLE_XPATH = "//th[contains(., 'Prüfung') or contains(., 'Exam') or contains(., 'ECTS')]/ancestor::table[1]"
+# QIS renders the achievement list as <table class="nb list">; checking that class first avoids
+# walking every header cell, while the header test guards against a different nb/list table
+_GRADE_TABLE_BY_CLASS = etree.XPath(
+    "(//table[contains(concat(' ', normalize-space(@class), ' '), ' nb ')"
+    " and contains(concat(' ', normalize-space(@class), ' '), ' list ')]"
+    "[.//th[contains(., 'Prüfung') or contains(., 'Exam') or contains(., 'ECTS')]])[1]")
+# Compiled once; yields at most the first matching table
+_GRADE_TABLE_BY_HEADER = etree.XPath(f"({GRADE_TABLE_XPATH})[1]")
+# Candidates for grade tables whose header row uses <td> cells: innermost tables mentioning
+# exams or credits anywhere in their text. A menu table holding only the "Prüfungsverwaltung"
+# link matches this too, so _find_grade_table_by_text also demands a row that looks like an exam.
+_GRADE_TABLE_CANDIDATES_BY_TEXT = etree.XPath(
+    "//table[not(.//table)][contains(., 'Prüfung') or contains(., 'Exam') or contains(., 'ECTS')]")
+# A German grade cell: 1,0 ... 5,0
+_RE_GRADE_CELL = re.compile(r'^[1-5],\d$')
+
+
+def _find_grade_table(tree):
+    """Return a one-element list with the grade table, or an empty list if the page has none.
+
+    Only tables marked up as grade tables (class or <th> header) count, so this is safe for
+    deciding whether a fetched page is the grade page at all.
+    """
+    return _GRADE_TABLE_BY_CLASS(tree) or _GRADE_TABLE_BY_HEADER(tree)
+
+
+def _find_grade_table_by_text(tree):
+    """Fallback for grade tables without <th> headers: the first candidate with a row of at
+    least three cells, one of them a grade. Returns a one-element list or an empty list.
+    """
+    for table in _GRADE_TABLE_CANDIDATES_BY_TEXT(tree):
+        for row in table.iter("tr"):
+            cells = [td.text_content().strip() for td in row.iter("td")]
+            if len(cells) >= 3 and any(_RE_GRADE_CELL.match(cell) for cell in cells):
+                return [table]
+    return []
+
+# Shared pool for running blocking scrapes off the event loop
+_SCRAPER_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=int(os.getenv("SCRAPER_POOL_MAX", "3")))
+
+# Encrypted per-user BOSS cookies, replayed to skip SSO + 2FA on re-scrape
+COOKIE_CACHE_DIR = os.path.join(DEBUG_DIR, "boss_cookies")
+
+# Hard limit for one get_data run; a stuck browser is killed after this
+SCRAPE_TIMEOUT_SECONDS = int(os.getenv("SCRAPE_TIMEOUT_SECONDS", "180"))
+
+# Seconds between wait condition checks (Selenium default is 0.5)
+WAIT_POLL_FREQUENCY = 0.1
+
+# Warm browsers kept between get_data calls, one per set of credentials
+DRIVER_POOL_SIZE = 4
+
+# Per-user deep links to the grade table, so repeat runs can skip the menu click-walk.
+# Keyed by username hash; the lock serialises the read-modify-write across scraper threads.
+DEEPLINK_CACHE_PATH = os.path.join(DEBUG_DIR, "boss_deeplinks.json")
+_deeplink_lock = threading.Lock()
+
+
+def _quit_driver(driver):
+    try:
+        driver.quit()
+    except Exception as e:
+        logger.warning(f"Failed to quit browser: {e}")
+
+
+def _parse_page(response):
+    """Parse an httpx response into an lxml tree with absolute links."""
+    tree = html.fromstring(response.content, base_url=str(response.url))
+    tree.make_links_absolute()
+    return tree
+
+
+def _first_href(tree, *xpaths):
+    """Return the href found by the first XPath (in priority order) that matches anything."""
+    for xpath in xpaths:
+        hrefs = tree.xpath(xpath)
+        if hrefs:
+            return hrefs[0]
+    return None
+
+
+def _submit_form(client, response, form_xpath, values):
+    """Submit the form matched by form_xpath with its own field values overridden by values.
+
+    Returns None if the page has no such form.
+    """
+    forms = _parse_page(response).xpath(form_xpath)
+    if not forms:
+        return None
+    form = forms[0]
+    data = dict(form.form_values())
+    data.update(values)
+    action = form.action or str(response.url)
+    if (form.method or "GET").upper() == "POST":
+        return client.post(action, data=data)
+    return client.get(action, params=data)
+
+
+def _parse_decimal(text):
+    """Parse a German-formatted number ("2,3"), returning None if the cell is not numeric."""
+    try:
+        return float(text.replace(',', '.'))
+    except ValueError:
+        return None
+
 
 class BossScraper:
+    _driver_pool = OrderedDict()  # credential hash -> (user key, webdriver.Chrome), least recently used first
+    _pool_lock = threading.Lock()
+    # Parent of the per-user Chrome profiles; subclasses scraping other sites use their own so
+    # a pooled BOSS browser (which keeps its profile locked) never blocks them
+    PROFILE_DIR = BOSS_SESSION_DIR
+
     def __init__(self, username, password, totp_secret=None):
         self.username = username
         self.password = password
         self.totp_secret = totp_secret
         self.driver = None
         self.wait = None
-        
-        if not os.path.exists(DEBUG_DIR):
-            os.makedirs(DEBUG_DIR, exist_ok=True)
+        self.quick_wait = None
+        self.nav_wait = None
+        self._http = None
+        self._cookie_jar = None
+        self._cookie_jar_host = None
+        self._totp_window = None  # TOTP time step whose code the HTTP path already submitted
 
     def _dump_debug_info(self, prefix="error"):
         if not self.driver: return
@@ -55,30 +247,36 @@ class BossScraper:
 
 
     def _setup_driver(self):
-        from selenium.webdriver.chrome.options import Options
-        from selenium.webdriver.chrome.service import Service
-        from webdriver_manager.chrome import ChromeDriverManager
-        import os
-
         chrome_options = Options()
+        # Performance: Return from get() on DOMContentLoaded instead of waiting for every subresource
+        chrome_options.page_load_strategy = 'eager'
         chrome_options.add_argument("--headless")
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument("--disable-gpu")
         chrome_options.add_argument("--window-size=1280,720")
         
-        # Performance Flag: Disable images
-        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        # Performance Flags: Skip background work Chrome does on startup and navigation
+        for flag in CHROME_PERF_FLAGS:
+            chrome_options.add_argument(flag)
+        
+        # Performance Flag: Disable images and notification prompts via content settings
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
         
         # Performance Flag: Reuse user data dir for session caching
         # We use a subfolder in DEBUG_DIR for BOSS specifically
-        boss_session_dir = os.path.join(DEBUG_DIR, "boss_session")
-        if not os.path.exists(boss_session_dir):
-            os.makedirs(boss_session_dir, exist_ok=True)
-        chrome_options.add_argument(f"--user-data-dir={boss_session_dir}")
+        # Chrome locks a profile dir, so each user gets their own to allow concurrent scrapes
+        # (Chrome creates the per-user subfolder itself)
+        chrome_options.add_argument(f"--user-data-dir={os.path.join(self.PROFILE_DIR, self._user_key())}")
+        if self.PROFILE_DIR == BOSS_SESSION_DIR:
+            # A pooled browser for other credentials of this user would still hold the profile lock
+            self._evict_pooled_profile()
         
         # User Agent for consistency
-        chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+        chrome_options.add_argument(f"user-agent={USER_AGENT}")
 
         try:
             # Shared Driver Path
@@ -87,11 +285,125 @@ class BossScraper:
 
             service = Service(driver_path)
             self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            self.wait = WebDriverWait(self.driver, 10) # Optimized timeout
+            self._init_waits()
         except Exception as e:
             logger.error(f"Failed to setup driver: {e}")
             raise
 
+        # Performance: Block subresources at the protocol level
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+            # Keep the HTTP cache on so scripts are reused between the login and grade pages
+            self.driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": False})
+        except Exception as e:
+            logger.warning(f"Could not enable CDP resource blocking: {e}")
+
+    def _init_waits(self):
+        self.wait = WebDriverWait(self.driver, 10, poll_frequency=WAIT_POLL_FREQUENCY) # Optimized timeout
+        # Per-phase waits: same-page element lookups fail fast, cross-site redirects get more time
+        self.quick_wait = WebDriverWait(self.driver, 3, poll_frequency=WAIT_POLL_FREQUENCY)
+        self.nav_wait = WebDriverWait(self.driver, 15, poll_frequency=WAIT_POLL_FREQUENCY)
+
+    def _user_key(self):
+        # Per-user file and folder names; the username comes from the request body and must never be a path
+        return hashlib.sha256(self.username.encode()).hexdigest()
+
+    def _pool_key(self):
+        # Keyed by password too, so a logged-in browser is never handed to different credentials
+        return hashlib.sha256(f"{self.username}:{self.password}".encode()).hexdigest()
+
+    def _checkout_pooled_driver(self):
+        """Take this user's warm browser out of the pool. Returns True if a live one was available."""
+        with BossScraper._pool_lock:
+            entry = BossScraper._driver_pool.pop(self._pool_key(), None)
+        if entry is None:
+            return False
+        driver = entry[1]
+        try:
+            driver.current_url  # Liveness probe
+        except WebDriverException:
+            _quit_driver(driver)
+            return False
+        logger.info("Reusing pooled browser session.")
+        self.driver = driver
+        self._init_waits()
+        return True
+
+    def _release_driver(self, keep):
+        """Put the browser back into the pool (evicting the least recently used), or quit it."""
+        driver, self.driver = self.driver, None
+        if driver is None:
+            return
+        if not keep:
+            _quit_driver(driver)
+            return
+        evicted = []
+        with BossScraper._pool_lock:
+            previous = BossScraper._driver_pool.pop(self._pool_key(), None)
+            if previous is not None:
+                evicted.append(previous[1])
+            BossScraper._driver_pool[self._pool_key()] = (self._user_key(), driver)
+            while len(BossScraper._driver_pool) > DRIVER_POOL_SIZE:
+                evicted.append(BossScraper._driver_pool.popitem(last=False)[1][1])
+        for old in evicted:
+            _quit_driver(old)
+
+    def _evict_pooled_profile(self):
+        """Quit pooled browsers running on this user's BOSS profile, releasing Chrome's lock on it."""
+        user_key = self._user_key()
+        with BossScraper._pool_lock:
+            keys = [k for k, (owner, _) in BossScraper._driver_pool.items() if owner == user_key]
+            evicted = [BossScraper._driver_pool.pop(k)[1] for k in keys]
+        for old in evicted:
+            _quit_driver(old)
+
+    @classmethod
+    def shutdown(cls):
+        """Quit all pooled browsers. Call on process exit."""
+        with cls._pool_lock:
+            drivers = [driver for _, driver in cls._driver_pool.values()]
+            cls._driver_pool.clear()
+        for driver in drivers:
+            _quit_driver(driver)
+
+    def _wait_for_unused_totp(self, totp):
+        """Sleep into the next TOTP time step if the HTTP path already sent this one's code (IdPs reject reuse)."""
+        if self._totp_window is None:
+            return
+        remaining = (self._totp_window + 1) * totp.interval - time.time()
+        if remaining > 0:
+            logger.info(f"TOTP code already used over HTTP, waiting {remaining:.1f}s for the next one.")
+            time.sleep(remaining)
+
+    def _page_contains(self, *needles, ignore_case=False):
+        """Substring check evaluated in the browser, avoiding a full page_source transfer per poll."""
+        return self.driver.execute_script(
+            "var t = document.documentElement.outerHTML;"
+            "if (arguments[1]) { t = t.toLowerCase(); }"
+            "return arguments[0].some(function (n) { return t.indexOf(n) !== -1; });",
+            list(needles), ignore_case,
+        )
+
+    def _find_first_visible(self, selectors):
+        """Return the first visible element matching a list of CSS selectors, or None.
+
+        All selectors are evaluated in one in-page script; the hit is tagged so a
+        single find_element call can return a handle to it.
+        """
+        found = self.driver.execute_script(
+            "document.querySelectorAll('[data-scraper-hit]').forEach(function (el) { el.removeAttribute('data-scraper-hit'); });"
+            "for (var i = 0; i < arguments[0].length; i++) {"
+            "  var el = document.querySelector(arguments[0][i]);"
+            "  if (el && el.offsetParent !== null) { el.setAttribute('data-scraper-hit', '1'); return true; }"
+            "}"
+            "return false;",
+            selectors,
+        )
+        if not found:
+            return None
+        return self.driver.find_element(By.CSS_SELECTOR, "[data-scraper-hit='1']")
+
     def login(self):
         logger.info("Navigating to BOSS...")
         self.driver.get("https://www.boss.tu-dortmund.de/")
@@ -99,14 +411,13 @@ class BossScraper:
         # 1. Faster Check: Am I already logged in or on SSO?
         # Use a short wait for the URL/Page to stabilize
         try:
-            self.wait.until(lambda d: "sso.itmc" in d.current_url or "menue=n" in d.page_source or "Anmelden" in d.page_source)
-        except:
+            self.wait.until(lambda d: "sso.itmc" in d.current_url or self._page_contains("menue=n", "Anmelden"))
+        except WebDriverException:
             pass
 
         current_url = self.driver.current_url
-        page_source = self.driver.page_source
 
-        if "boss.tu-dortmund.de" in current_url and "menue=n" in page_source:
+        if "boss.tu-dortmund.de" in current_url and self._page_contains("menue=n"):
             logger.info("Session resumed (already logged in to BOSS)")
             return True
             
@@ -118,22 +429,22 @@ class BossScraper:
             try:
                 # Use find_elements to check existence without waiting if possible, 
                 # or a very short explicit wait.
-                short_wait = WebDriverWait(self.driver, 2)
+                short_wait = WebDriverWait(self.driver, 2, poll_frequency=WAIT_POLL_FREQUENCY)
                 login_btn = short_wait.until(EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, "Anmelden")))
                 login_btn.click()
                 logger.info("Clicked 'Anmelden'")
-            except:
+            except WebDriverException:
                 try:
-                    short_wait = WebDriverWait(self.driver, 1)
+                    short_wait = WebDriverWait(self.driver, 1, poll_frequency=WAIT_POLL_FREQUENCY)
                     login_btn = short_wait.until(EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, "Login")))
                     login_btn.click()
                     logger.info("Clicked 'Login'")
-                except:
+                except WebDriverException:
                     logger.warning("Could not find 'Anmelden' or 'Login' buttons within short timeout. Final SSO check...")
             
             # Final check if we reached SSO
             try:
-                self.wait.until(EC.url_contains("sso.itmc"))
+                self.nav_wait.until(EC.url_contains("sso.itmc"))
             except TimeoutException:
                  if "sso.itmc" not in self.driver.current_url:
                      logger.warning("Still not on SSO. Proceeding to check for credential fields anyway...")
@@ -144,21 +455,12 @@ class BossScraper:
         logger.info("Injecting credentials...")
         
         # Robust Username Search
-        username_field = None
-        strategies = [
-            (By.ID, "username"),
-            (By.NAME, "j_username"),
-            (By.CSS_SELECTOR, "input[type='text']"),
-            (By.CSS_SELECTOR, "input[type='email']")
-        ]
-        
-        for by, val in strategies:
-            try:
-                username_field = self.driver.find_element(by, val)
-                if username_field.is_displayed():
-                    break
-            except:
-                continue
+        username_field = self._find_first_visible([
+            "#username",
+            "input[name='j_username']",
+            "input[type='text']",
+            "input[type='email']"
+        ])
                 
         if not username_field:
             logger.error(f"Could not find username field. Source: {self.driver.page_source[:500]}")
@@ -168,20 +470,11 @@ class BossScraper:
         username_field.send_keys(self.username)
         
         # Robust Password Search
-        password_field = None
-        p_strategies = [
-            (By.ID, "password"),
-            (By.NAME, "j_password"),
-            (By.CSS_SELECTOR, "input[type='password']")
-        ]
-        
-        for by, val in p_strategies:
-            try:
-                password_field = self.driver.find_element(by, val)
-                if password_field.is_displayed():
-                    break
-            except:
-                continue
+        password_field = self._find_first_visible([
+            "#password",
+            "input[name='j_password']",
+            "input[type='password']"
+        ])
                 
         if not password_field:
             raise Exception("Password field not found")
@@ -190,21 +483,15 @@ class BossScraper:
         password_field.send_keys(self.password)
         
         # Robust Submit Button
-        submit_btn = None
-        s_strategies = [
-            (By.NAME, "_eventId_proceed"),
-            (By.CSS_SELECTOR, "button[type='submit']"),
-            (By.CSS_SELECTOR, "input[type='submit']"),
-            (By.XPATH, "//button[contains(text(), 'Login') or contains(text(), 'Anmelden')]")
-        ]
-        
-        for by, val in s_strategies:
-            try:
-                submit_btn = self.driver.find_element(by, val)
-                if submit_btn.is_displayed():
-                    break
-            except:
-                continue
+        submit_btn = self._find_first_visible([
+            "[name='_eventId_proceed']",
+            "button[type='submit']",
+            "input[type='submit']"
+        ])
+        if not submit_btn:
+            # Text match has no CSS equivalent
+            buttons = self.driver.find_elements(By.XPATH, "//button[contains(text(), 'Login') or contains(text(), 'Anmelden')]")
+            submit_btn = buttons[0] if buttons else None
                 
         if submit_btn:
             submit_btn.click()
@@ -215,42 +502,34 @@ class BossScraper:
         # Step 3: Handle 2FA
         # Wait for either error, 2FA, or redirect back to BOSS
         try:
-            self.wait.until(lambda d: "error" in d.page_source.lower() or "fehlgeschlagen" in d.page_source.lower() or 
-                           "sso.itmc" in d.current_url or "boss.tu-dortmund.de" in d.current_url)
-        except:
+            self.wait.until(lambda d: d.execute_script(_JS_LOGIN_OUTCOME) != 0)
+        except WebDriverException:
             pass
 
-        page_source = self.driver.page_source.lower()
+        page_source = self.driver.page_source
+        source_url = self.driver.current_url
         
         # Check for error
-        if "login failed" in page_source or "fehlgeschlagen" in page_source:
+        if _RE_LOGIN_FAILED.search(page_source):
              raise Exception("Invalid Credentials")
 
-        if "sso.itmc" in self.driver.current_url and any(x in page_source for x in ["one-time password", "second factor", "zweiter faktor", "sicherheitstoken", "security token"]):
+        if "sso.itmc" in source_url and _RE_2FA.search(page_source):
             logger.info("2FA Challenge detected.")
             if not self.totp_secret:
                 raise Exception("2FA required but no TOTP secret provided.")
             
             totp = pyotp.TOTP(self.totp_secret)
+            self._wait_for_unused_totp(totp)
             token = totp.now()
             logger.info("Generated TOTP token.")
             
             # Robust Token Input Field
-            token_input = None
-            t_strategies = [
-                (By.ID, "token"),
-                (By.NAME, "otp"),
-                (By.CSS_SELECTOR, "input[type='text'][inputmode='numeric']"), # Common for OTP
-                (By.CSS_SELECTOR, "input[type='text']") # Fallback
-            ]
-            
-            for by, val in t_strategies:
-                try:
-                    token_input = self.driver.find_element(by, val)
-                    if token_input.is_displayed():
-                        break
-                except:
-                    continue
+            token_input = self._find_first_visible([
+                "#token",
+                "input[name='otp']",
+                "input[type='text'][inputmode='numeric']", # Common for OTP
+                "input[type='text']" # Fallback
+            ])
             
             if not token_input:
                 raise Exception("2FA token input field not found.")
@@ -261,14 +540,15 @@ class BossScraper:
             # Find submit for 2FA
             try:
                 verify_btn = self.driver.find_element(By.NAME, "_eventId_proceed")
-            except:
+            except NoSuchElementException:
                 verify_btn = self.driver.find_element(By.CSS_SELECTOR, "button[type='submit']")
                 
             verify_btn.click()
+            source_url = None
             # Wait for redirect after 2FA
             try:
-                self.wait.until(EC.url_contains("boss.tu-dortmund.de"))
-            except:
+                self.nav_wait.until(EC.url_contains("boss.tu-dortmund.de"))
+            except WebDriverException:
                 pass
             
         # Step 4: Verification
@@ -279,11 +559,15 @@ class BossScraper:
                  logger.info("Returned to BOSS domain.")
             else:
                  # Wait a bit more
-                 self.wait.until(EC.url_contains("boss.tu-dortmund.de"))
+                 self.nav_wait.until(EC.url_contains("boss.tu-dortmund.de"))
                  logger.info("Returned to BOSS domain (after wait).")
 
-            # Check for maintenance
-            if "Wartungsarbeiten" in self.driver.page_source:
+            # Check for maintenance, reusing the Step 3 source if we have not navigated since
+            if self.driver.current_url != source_url:
+                under_maintenance = self._page_contains("Wartungsarbeiten")
+            else:
+                under_maintenance = "Wartungsarbeiten" in page_source
+            if under_maintenance:
                 raise Exception("BOSS is currently down for maintenance.")
         except TimeoutException:
             logger.error("Failed to return to BOSS after login.")
@@ -294,33 +578,27 @@ class BossScraper:
     def navigate_to_grades(self):
         logger.info("Navigating to transcripts...")
         # Link 1: Prüfungsverwaltung / Exam Administration
-        try:
-            link1 = self.wait.until(EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, "Prüfungsverwaltung")))
-        except:
-            try:
-                 link1 = self.wait.until(EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, "Exam Administration")))
-            except:
-                 # Depending on language settings
-                 link1 = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "a[href*='menue=n']"))) # generic heuristic if text fails
-        
+        # One wait polls every locator in priority order, so a language mismatch costs no extra timeouts
+        link1 = self.quick_wait.until(EC.any_of(
+            EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, "Prüfungsverwaltung")),
+            EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, "Exam Administration")),
+            EC.element_to_be_clickable((By.CSS_SELECTOR, "a[href*='menue=n']")), # generic heuristic if text fails
+        ))
         link1.click()
         
         # Link 2: Notenspiegel / Grades
-        try:
-            link2 = self.wait.until(EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, "Notenspiegel")))
-        except:
-            try:
-                link2 = self.wait.until(EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, "Notenübersicht")))
-            except:
-                 link2 = self.wait.until(EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, "Grades")))
-        
+        link2 = self.nav_wait.until(EC.any_of(
+            EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, "Notenspiegel")),
+            EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, "Notenübersicht")),
+            EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, "Grades")),
+        ))
         link2.click()
         
         # Wait for tree view to load (usually an info icon or specific text)
         try:
-            self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "a[title='Leistungen anzeigen'], a[title='Show achievements']")))
+            self.nav_wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "a[title='Leistungen anzeigen'], a[title='Show achievements']")))
             logger.info("Tree view loaded.")
-        except:
+        except WebDriverException:
             logger.warning("Timeout waiting for tree view icons, proceeding anyway.")
         
         # Target 3: Select degree program (if multiple)
@@ -365,7 +643,7 @@ class BossScraper:
                 try:
                     # Wait for a table cell with "Prüfung" or "Exam" or "ECTS"
                     # Or just wait for ANY table that looks like a grade table
-                    self.wait.until(lambda d: "Prüfung" in d.page_source or "Exam" in d.page_source or "ECTS" in d.page_source)
+                    self.nav_wait.until(lambda d: self._page_contains("Prüfung", "Exam", "ECTS"))
                     logger.info("Successfully navigated to grade table view.")
                 except TimeoutException:
                     logger.warning("Clicked link but grade table did not appear within timeout.")
@@ -375,12 +653,12 @@ class BossScraper:
                  # Fallback to previous heuristic if no icon found
                  logger.warning("Specific grade link not found, trying generic asi link...")
                  try:
-                      program_link = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "a[href*='asi']")))
+                      program_link = self.quick_wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "a[href*='asi']")))
                       program_link.click()
                       logger.info("Clicked generic degree program link.")
                       # Try to wait for table
-                      self.wait.until(lambda d: "Prüfung" in d.page_source or "Exam" in d.page_source)
-                 except:
+                      self.nav_wait.until(lambda d: self._page_contains("Prüfung", "Exam"))
+                 except WebDriverException:
                       logger.warning("Generic asi link also not found.")
         
         except Exception as e:
@@ -391,76 +669,329 @@ class BossScraper:
         # Usually BOSS shows the grades directly after selecting program, or asks for HTML vs PDF.
         # Assuming we might be there, or need one more click on "Info" equivalent.
         # Check if we have a table with 'Prüfung'
-        if "Prüfung" not in self.driver.page_source and "Exam" not in self.driver.page_source:
+        if not self._page_contains("Prüfung", "Exam"):
              logger.warning("Grade table not immediately visible, checking for further links.")
         
 
+    def _cookie_path(self):
+        return os.path.join(COOKIE_CACHE_DIR, f"{self._user_key()}.enc")
+
+    def _cookie_cipher(self):
+        """Fernet cipher keyed by the user's password, so the file is useless without the credentials."""
+        key = hashlib.pbkdf2_hmac("sha256", self.password.encode(), self.username.encode(), 100_000)
+        return Fernet(base64.urlsafe_b64encode(key))
+
+    def _save_session_cookies(self, cookies=None):
+        """Encrypt and store cookies (the browser's unless given) so the next run can resume the session."""
+        try:
+            if cookies is None:
+                cookies = self.driver.get_cookies()
+            payload = self._cookie_cipher().encrypt(json.dumps(cookies).encode())
+            os.makedirs(COOKIE_CACHE_DIR, exist_ok=True)
+            # Browser and HTTP logins both write here; replace atomically so a reader never sees half a file
+            with tempfile.NamedTemporaryFile("wb", dir=COOKIE_CACHE_DIR, suffix=".enc", delete=False) as f:
+                f.write(payload)
+            os.replace(f.name, self._cookie_path())
+            logger.info("Stored BOSS session cookies.")
+        except (OSError, WebDriverException) as e:
+            logger.warning(f"Failed to store session cookies: {e}")
+
+    def _load_session_cookies(self):
+        """Decrypt the cookies stored by a previous login, or return None."""
+        try:
+            with open(self._cookie_path(), "rb") as f:
+                return json.loads(self._cookie_cipher().decrypt(f.read()))
+        except FileNotFoundError:
+            return None
+        except (OSError, InvalidToken, ValueError) as e:
+            logger.info(f"Ignoring unreadable session cookie cache: {e}")
+            return None
+
+    def _restore_http_cookies(self, client):
+        """Load the stored session cookies into the HTTP client. Returns True if any were loaded."""
+        cookies = self._load_session_cookies()
+        if not cookies:
+            return False
+        for cookie in cookies:
+            client.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''), path=cookie.get('path', '/'))
+        logger.info(f"Restored {len(cookies)} cached session cookies for HTTP.")
+        return True
+
+    @staticmethod
+    def _http_cookie_dicts(client):
+        """The client's cookies in Selenium's get_cookies() format, so either path can restore them."""
+        return [{"name": c.name, "value": c.value, "domain": c.domain, "path": c.path, "secure": bool(c.secure)}
+                for c in client.cookies.jar]
+
+    def _restore_session_cookies(self):
+        """Replay cookies from a previous login so login() can resume the session. Returns True if any were loaded."""
+        cookies = self._load_session_cookies()
+        if not cookies:
+            return False
+
+        # Cookies can only be set for the domain currently loaded
+        self.driver.get("https://www.boss.tu-dortmund.de/")
+        for cookie in cookies:
+            try:
+                self.driver.add_cookie(cookie)
+            except WebDriverException:
+                continue
+        logger.info(f"Restored {len(cookies)} cached session cookies.")
+        return True
+
+    def _load_deeplinks(self):
+        try:
+            with open(DEEPLINK_CACHE_PATH, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_deeplink(self, url):
+        """Remember the grade table URL for this user (atomic replace, so readers never see a partial file)."""
+        with _deeplink_lock:
+            deeplinks = self._load_deeplinks()
+            deeplinks[self._user_key()] = url
+            try:
+                with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".json",
+                                                 dir=os.path.dirname(DEEPLINK_CACHE_PATH), delete=False) as f:
+                    json.dump(deeplinks, f)
+                os.replace(f.name, DEEPLINK_CACHE_PATH)
+            except OSError as e:
+                logger.warning(f"Failed to store grade deep link: {e}")
+
+    def _open_cached_grades(self):
+        """Jump straight to the cached grade table URL. Returns True if the table loaded."""
+        cached_url = self._load_deeplinks().get(self._user_key())
+        if not cached_url:
+            return False
+
+        logger.info("Trying cached grade table URL...")
+        self.driver.get(cached_url)
+        try:
+            # The menu always contains "Prüfungsverwaltung", so look for the table header itself
+            self.nav_wait.until(EC.presence_of_element_located(
+                (By.XPATH, GRADE_TABLE_XPATH)
+            ))
+            logger.info("Cached grade table URL still valid, skipped menu navigation.")
+            return True
+        except TimeoutException:
+            logger.info("Cached grade table URL is stale, falling back to menu navigation.")
+            return False
+
+    def _http_client(self):
+        """Lazily create the HTTP/2 client shared by all fetches of this scraper run."""
+        if self._http is None:
+            self._http = httpx.Client(headers=HTTP_HEADERS, timeout=20.0, follow_redirects=True, http2=True)
+        return self._http
+
+    def _close_http(self):
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+            self._cookie_jar = None
+            self._cookie_jar_host = None
+
     def _fetch_page_via_requests(self, url):
-        """Fetch a page using httpx by reusing Selenium cookies."""
+        """Fetch a page using httpx by reusing Selenium cookies.
+
+        Returns the raw body bytes; lxml and BeautifulSoup pick up the charset from the page itself.
+        """
         logger.info(f"Fetching {url} via httpx...")
         
-        # Extract cookies from Selenium
-        selenium_cookies = self.driver.get_cookies()
-        jar = httpx.Cookies()
-        for cookie in selenium_cookies:
-            jar.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''))
-            
-        user_agent = self.driver.execute_script("return navigator.userAgent")
-        headers = {
-            "User-Agent": user_agent,
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-            "Connection": "keep-alive",
-            "Upgrade-Insecure-Requests": "1"
-        }
+        client = self._http_client()
+
+        # Extract cookies from Selenium, once per host for this session
+        host = urlsplit(url).hostname
+        if self._cookie_jar is None or self._cookie_jar_host != host:
+            self._cookie_jar = httpx.Cookies()
+            for cookie in self.driver.get_cookies():
+                self._cookie_jar.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''))
+            self._cookie_jar_host = host
+            client.cookies.update(self._cookie_jar)
         
         try:
-            with httpx.Client(cookies=jar, headers=headers, timeout=20.0, follow_redirects=True) as client:
-                response = client.get(url)
-                response.raise_for_status()
-                return response.text
+            response = client.get(url)
+            response.raise_for_status()
+            return response.content
         except Exception as e:
             logger.error(f"Failed to fetch via httpx: {e}")
             return None
 
+    def _get_grades_via_http(self, client):
+        """Run SSO login and grade navigation as plain HTTP form posts.
+
+        Returns the grade page HTML, or None when a step needs a real browser
+        (unexpected page, JS-only redirect) so the caller can fall back to Selenium.
+        A TOTP code sent here is recorded in _totp_window so the browser login waits
+        for a fresh one.
+        """
+        # Cookies from the last login (either path) usually still hold a BOSS or SSO session
+        self._restore_http_cookies(client)
+        page = client.get(BOSS_URL)
+        # Maintenance pages carry no login link; catch them here rather than after a browser launch
+        if "Wartungsarbeiten" in page.text:
+            raise Exception("BOSS is currently down for maintenance.")
+        needs_login = "menue=n" not in page.text
+        if needs_login:
+            login_url = _first_href(_parse_page(page), "//a[contains(., 'Anmelden') or contains(., 'Login')]/@href")
+            if login_url:
+                page = client.get(login_url)
+            if "sso.itmc" not in str(page.url):
+                return None
+
+            # A live SSO session answers with the SAML form straight away, no credentials needed
+            if "SAMLResponse" not in page.text:
+                page = _submit_form(client, page, "//form[.//input[@name='j_username']]", {
+                    "j_username": self.username,
+                    "j_password": self.password,
+                    "_eventId_proceed": "",
+                })
+                if page is None:
+                    return None
+                if _RE_LOGIN_FAILED.search(page.text):
+                    raise Exception("Invalid Credentials")
+
+                if "sso.itmc" in str(page.url) and _RE_2FA.search(page.text):
+                    if not self.totp_secret:
+                        raise Exception("2FA required but no TOTP secret provided.")
+                    token_fields = _parse_page(page).xpath(
+                        "//input[@id='token' or @name='otp' or @inputmode='numeric']/@name")
+                    if not token_fields:
+                        return None
+                    totp = pyotp.TOTP(self.totp_secret)
+                    # Recorded before the post, since a timeout doesn't mean SSO never saw the code
+                    self._totp_window = int(time.time() // totp.interval)
+                    page = _submit_form(client, page, f"//form[.//input[@name='{token_fields[0]}']]", {
+                        token_fields[0]: totp.now(),
+                        "_eventId_proceed": "",
+                    })
+                    if page is None:
+                        return None
+
+            # Shibboleth hands the SAML assertion back through a JS auto-submit form; post it manually
+            for _ in range(3):
+                if "SAMLResponse" not in page.text:
+                    break
+                page = _submit_form(client, page, "//form[.//input[@name='SAMLResponse']]", {})
+
+            if "boss.tu-dortmund.de" not in str(page.url) or "menue=n" not in page.text:
+                return None
+        if "Wartungsarbeiten" in page.text:
+            raise Exception("BOSS is currently down for maintenance.")
+        logger.info("Logged in to BOSS via HTTP.")
+        if needs_login:
+            self._save_session_cookies(self._http_cookie_dicts(client))
+
+        cached_url = self._load_deeplinks().get(self._user_key())
+        if cached_url:
+            grades = client.get(cached_url)
+            if _find_grade_table(_parse_page(grades)):
+                return grades.content
+
+        tree = _parse_page(page)
+        link1 = _first_href(tree,
+            "//a[contains(., 'Prüfungsverwaltung') or contains(., 'Exam Administration')]/@href",
+            "//a[contains(@href, 'menue=n')]/@href")
+        if not link1:
+            return None
+        tree = _parse_page(client.get(link1))
+        link2 = _first_href(tree,
+            "//a[contains(., 'Notenspiegel')]/@href",
+            "//a[contains(., 'Notenübersicht')]/@href",
+            "//a[contains(., 'Grades')]/@href")
+        if not link2:
+            return None
+        tree = _parse_page(client.get(link2))
+        # Like the browser path, the last "Leistungen anzeigen" link is the most specific tree node.
+        # One link per degree/subtree node; try them from the last one back on the shared session
+        # (QIS state is per session, so no parallel requests) and keep the first grade table
+        links = list(dict.fromkeys(tree.xpath(
+            "//a[@title='Leistungen anzeigen' or @title='Show achievements' or contains(@title, 'Notenspiegel')"
+            " or .//img[@title='Leistungen anzeigen']]/@href")))
+        for link in reversed(links):
+            grades = client.get(link)
+            if _find_grade_table(_parse_page(grades)):
+                self._save_deeplink(str(grades.url))
+                return grades.content
+        return None
+
+    def _get_grades_via_browser(self, pooled):
+        """Drive Chrome through login and grade navigation; returns the grade page HTML.
+
+        pooled says whether get_data already checked out a warm browser into self.driver.
+        """
+        if not pooled:
+            self._setup_driver()
+            self._restore_session_cookies()
+        # A warm browser still sitting in a BOSS session can skip login entirely
+        resumed = (pooled and "boss.tu-dortmund.de" in self.driver.current_url
+                   and self._page_contains("menue=n") and self._open_cached_grades())
+        if not resumed:
+            # login() returns True when the (restored) session is still valid. The cached link
+            # carries the old session's asi token, so after a fresh login it is always stale.
+            session_resumed = self.login()
+            if not session_resumed:
+                self._save_session_cookies()
+            if not (session_resumed and self._open_cached_grades()):
+                self.navigate_to_grades()
+                # Only remember the URL once it is known to show the grade table
+                if self.driver.find_elements(By.XPATH, GRADE_TABLE_XPATH):
+                    self._save_deeplink(self.driver.current_url)
+        
+        # Now that we are at the grades page, let's try to "turbo-charge" 
+        # by fetching the final HTML content via httpx if we can determine the URL.
+        current_url = self.driver.current_url
+        logger.info(f"Final grade page URL: {current_url}")
+        
+        # Attempt to fetch via requests for faster processing (no JS overhead)
+        html_content = self._fetch_page_via_requests(current_url)
+        
+        if html_content:
+            logger.info("Successfully fetched HTML via hybrid httpx mode.")
+        else:
+             logger.warning("Hybrid mode failed, falling back to Selenium source.")
+             html_content = self.driver.page_source
+        return html_content
+
+    def _abort_runaway_browser(self):
+        # SIGALRM only works on the main thread, and scrapes run in the executor, so a timer quits the
+        # browser instead; any Selenium call still in flight then fails and get_data unwinds normally.
+        logger.error(f"Scrape exceeded {SCRAPE_TIMEOUT_SECONDS}s, killing browser.")
+        if self.driver:
+            _quit_driver(self.driver)
+
     def get_data(self):
+        keep_driver = False
+        watchdog = threading.Timer(SCRAPE_TIMEOUT_SECONDS, self._abort_runaway_browser)
+        watchdog.daemon = True
+        watchdog.start()
         try:
-            self._setup_driver()
-            self.login()
-            self.navigate_to_grades()
-            
-            # Now that we are at the grades page, let's try to "turbo-charge" 
-            # by fetching the final HTML content via httpx if we can determine the URL.
-            current_url = self.driver.current_url
-            logger.info(f"Final grade page URL: {current_url}")
-            
-            # Attempt to fetch via requests for faster processing (no JS overhead)
-            html_content = self._fetch_page_via_requests(current_url)
-            
-            if html_content:
-                logger.info("Successfully fetched HTML via hybrid httpx mode.")
-                # We update the driver's page source (fake it or just parse it)
-                # But since extract methods use soup, we can just pass content or parse it directly
-                # For compatibility, we'll use a local soup object or just let the extract methods know.
-                pass
-            else:
-                 logger.warning("Hybrid mode failed, falling back to Selenium source.")
-                 html_content = self.driver.page_source
-
-            # Extract degree identity
-            soup = BeautifulSoup(html_content, 'html.parser')
-            # Modification: extract methods now use the provided soup if needed, 
-            # or we can just replace self.driver.page_source logic.
-            # To keep it simple, I'll temporarily 'mock' the driver's page source or just edit the methods.
-            
-            # Let's slightly modify extract methods to accept optional html
-            degree_identity = self.extract_degree_identity_from_content(html_content)
-            exams, summary = self.extract_grades_from_content(html_content)
+            html_content = None
+            # A warm browser from an earlier run is usually still logged in, so it goes first
+            pooled = self._checkout_pooled_driver()
+            if not pooled:
+                # Happy path: SSO is plain HTML forms, so no browser is needed
+                try:
+                    html_content = self._get_grades_via_http(self._http_client())
+                except httpx.HTTPError as e:
+                    logger.warning(f"HTTP login failed: {e}")
+            if html_content is None:
+                if not pooled:
+                    logger.info("HTTP login not possible, falling back to Selenium.")
+                # Drop any half-finished SSO cookies before the browser's own are copied in
+                self._http_client().cookies.clear()
+                html_content = self._get_grades_via_browser(pooled)
+
+            # Parse once and share the tree between both extractors
+            tree = html.fromstring(html_content)
+            degree_identity = self.extract_degree_identity_from_content(html_content, tree)
+            exams, summary = self.extract_grades_from_content(html_content, tree)
             
             if not exams:
                  logger.warning("No exams found! Dumping debug info.")
                  self._dump_debug_info("empty_exams")
             
+            keep_driver = True
             return {
                 "timestamp": datetime.now().isoformat(),
                 "degree_identity": degree_identity,
@@ -473,69 +1004,73 @@ class BossScraper:
             self._dump_debug_info("scraper_failure")
             return {"error": str(e)}
         finally:
-            if self.driver:
-                self.driver.quit()
+            watchdog.cancel()
+            self._close_http()
+            self._release_driver(keep=keep_driver)
+
+    async def get_data_async(self):
+        """Run get_data in the shared scraper pool without blocking the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(_SCRAPER_EXECUTOR, self.get_data)
 
     # Refactored Extraction Methods
-    def extract_degree_identity_from_content(self, html_content):
-        import re
-        soup = BeautifulSoup(html_content, 'html.parser')
+    def extract_degree_identity_from_content(self, html_content, tree=None):
+        if tree is None:
+            tree = html.fromstring(html_content)
         degree_info = {'degree_type': None,'degree_subject': None,'po_version': None,'degree_code': None,'abschluss_code': None}
         try:
             # Strategy 1: Parse from table header cells (new BOSS format)
-            header_cells = soup.find_all('th')
-            for cell in header_cells:
-                text = cell.get_text(strip=True)
-                abschluss_match = re.search(r'Abschluss:\[(\d+)\]\s*([^S]+)', text, re.IGNORECASE)
+            for cell in tree.iter('th'):
+                text = cell.text_content().strip()
+                abschluss_match = _RE_ABSCHLUSS.search(text)
                 if abschluss_match:
                     degree_info['abschluss_code'] = abschluss_match.group(1)
                     type_text = abschluss_match.group(2).strip()
                     if 'Bachelor' in type_text: degree_info['degree_type'] = 'Bachelor'
                     elif 'Master' in type_text: degree_info['degree_type'] = 'Master'
                     else: degree_info['degree_type'] = type_text.split()[0] if type_text else None
-                studiengang_match = re.search(r'Studiengang:\[([A-Z]\d+)\]\s*(.+?)(?:\(|$)', text, re.IGNORECASE)
+                studiengang_match = _RE_STUDIENGANG.search(text)
                 if studiengang_match:
                     degree_info['degree_code'] = studiengang_match.group(1)
                     degree_info['degree_subject'] = studiengang_match.group(2).strip()
+                # Both codes found, the remaining header cells cannot add anything
+                if degree_info['abschluss_code'] and degree_info['degree_code']:
+                    break
             
+            # Strategy 2: Plain-text "Abschluss NN Bachelor/Master" anywhere on the page
+            # (searched in the decoded tree text, since html_content may be undecoded bytes)
             if not degree_info['degree_type']:
-                abschluss_text_match = re.search(r'Abschluss\s+(\d+)\s+(Bachelor|Master)', html_content, re.IGNORECASE)
+                abschluss_text_match = _RE_ABSCHLUSS_TEXT.search(tree.text_content())
                 if abschluss_text_match:
                     degree_info['abschluss_code'] = abschluss_text_match.group(1)
                     degree_info['degree_type'] = abschluss_text_match.group(2)
             
+            # Strategy 3: Legacy <font class="liste1"> subject line with PO version
             if not degree_info['degree_subject']:
-                font_elements = soup.find_all('font', class_='liste1')
+                font_elements = tree.xpath("//font[contains(concat(' ', normalize-space(@class), ' '), ' liste1 ')]")
                 for font in font_elements:
-                    text = font.get_text(strip=True)
-                    po_match = re.search(r'(.+?)\s*\(PO-Version\s+(\d+)\)', text)
+                    text = font.text_content().strip()
+                    po_match = _RE_PO.search(text)
                     if po_match:
                         degree_info['degree_subject'] = po_match.group(1).strip()
                         degree_info['po_version'] = po_match.group(2)
                         break
-        except: pass
+        except (AttributeError, IndexError, ValueError): pass
         return degree_info
 
-    def extract_grades_from_content(self, html_content):
-        soup = BeautifulSoup(html_content, 'html.parser')
-        tables = soup.find_all("table")
-        target_table = None
-        for table in tables:
-            text = table.get_text()
-            if "Prüfung" in text or "Exam" in text or "ECTS" in text:
-                target_table = table
-                break
-        if not target_table: return [], {}
-        rows = target_table.find_all("tr")
+    def extract_grades_from_content(self, html_content, tree=None):
+        if tree is None:
+            tree = html.fromstring(html_content)
+        tables = _find_grade_table(tree) or _find_grade_table_by_text(tree)
+        if not tables: return [], {}
+        target_table = tables[0]
         exams = []
-        total_ects = 0.0; grade_sum = 0.0; graded_count = 0
         header_map = {}
         data_rows = []
-        for row in rows:
-            th_list = row.find_all("th")
+        for row in target_table.iter("tr"):
+            th_list = [th.text_content().strip() for th in row.iter("th")]
             if th_list:
                 for idx, th in enumerate(th_list):
-                    t = th.get_text(strip=True).lower()
+                    t = th.lower()
                     if "nr" in t or ("id" in t and "ver" not in t): header_map['id'] = idx
                     elif "text" in t or "bezeichnung" in t: header_map['title'] = idx
                     elif "sem" in t: header_map['semester'] = idx
@@ -543,45 +1078,37 @@ class BossScraper:
                     elif "status" in t or "vermerk" in t: header_map['status'] = idx
                     elif "ects" in t or "credit" in t or "bonus" in t: header_map['credits'] = idx
                 continue
-            td_list = row.find_all("td")
+            td_list = [td.text_content().strip() for td in row.iter("td")]
             if not td_list or len(td_list) < 3: continue 
             data_rows.append(td_list)
         if not header_map: header_map = {'id': 0, 'title': 1, 'semester': 2, 'grade': 3, 'status': 4, 'credits': 5}
+        # Resolve column positions once instead of per row
+        leading_columns = [(key, header_map[field]) for field, key in (('title', 'title'), ('id', 'exam_id'), ('semester', 'semester')) if field in header_map]
+        grade_idx = header_map.get('grade')
+        status_idx = header_map.get('status')
+        credits_idx = header_map.get('credits')
+        total_ects = 0.0; grade_sum = 0.0; graded_count = 0
         for cells in data_rows:
-            try:
-                exam = {}
-                idx = header_map.get('title')
-                if idx is not None and idx < len(cells): exam['title'] = cells[idx].get_text(strip=True)
-                idx = header_map.get('id')
-                if idx is not None and idx < len(cells): exam['exam_id'] = cells[idx].get_text(strip=True)
-                idx = header_map.get('semester')
-                if idx is not None and idx < len(cells): exam['semester'] = cells[idx].get_text(strip=True)
-                idx = header_map.get('grade')
-                raw_grade = ""
-                if idx is not None and idx < len(cells): raw_grade = cells[idx].get_text(strip=True).replace(',', '.')
-                try:
-                     exam['grade'] = float(raw_grade)
-                     if exam['grade'] > 0:
-                         grade_sum += exam['grade']
-                         graded_count += 1
-                except: exam['grade'] = None
-                idx = header_map.get('status')
-                if idx is not None and idx < len(cells): exam['status'] = cells[idx].get_text(strip=True)
-                idx = header_map.get('credits')
-                try:
-                    if idx is not None and idx < len(cells):
-                        c = float(cells[idx].get_text(strip=True).replace(',', '.'))
-                        exam['credits'] = c
-                        if exam.get('status') == "bestanden" or (exam['grade'] and exam['grade'] <= 4.0):
-                             total_ects += c
-                except: exam['credits'] = 0.0
-                if exam.get('title'): exams.append(exam)
-            except: continue
+            n = len(cells)
+            exam = {key: cells[idx] for key, idx in leading_columns if idx < n}
+            grade = _parse_decimal(cells[grade_idx]) if grade_idx is not None and grade_idx < n else None
+            exam['grade'] = grade
+            if grade and grade > 0:
+                grade_sum += grade
+                graded_count += 1
+            status = cells[status_idx] if status_idx is not None and status_idx < n else None
+            if status is not None: exam['status'] = status
+            if credits_idx is not None and credits_idx < n:
+                exam['credits'] = credits = _parse_decimal(cells[credits_idx]) or 0.0
+                if status == "bestanden" or (grade and grade <= 4.0):
+                    total_ects += credits
+            # Rows without a title (e.g. sub-achievements) count towards the totals but aren't listed
+            if exam.get('title'): exams.append(exam)
         official_gpa = 0.0; official_ects = 0.0
         if exams:
             last_exam = exams[-1]
-            if last_exam.get('grade'): official_gpa = last_exam['grade']
+            if last_exam['grade']: official_gpa = last_exam['grade']
             if last_exam.get('credits'): official_ects = last_exam['credits']
-        final_gpa = official_gpa if official_gpa > 0 else (round(grade_sum / graded_count, 2) if graded_count > 0 else 0.0)
+        final_gpa = official_gpa if official_gpa > 0 else (round(grade_sum / graded_count, 2) if graded_count else 0.0)
         final_ects = official_ects if official_ects > 0 else total_ects
         return exams, {"total_credits": final_ects, "current_gpa": final_gpa}
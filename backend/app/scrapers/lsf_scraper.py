@@ -1,13 +1,21 @@
 import logging
+import os
 import time
 from bs4 import BeautifulSoup
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from app.scrapers.boss_scraper import BossScraper
+from app.utils.webdriver_utils import DEBUG_DIR
 
 logger = logging.getLogger(__name__)
 
+# LSF browsers get their own profiles: the BOSS ones may be locked by a pooled browser
+LSF_SESSION_DIR = os.path.join(DEBUG_DIR, "lsf_session")
+os.makedirs(LSF_SESSION_DIR, exist_ok=True)
+
 class LsfScraper(BossScraper):
+    PROFILE_DIR = LSF_SESSION_DIR
+
     def __init__(self, username, password, totp_secret=None):
         super().__init__(username, password, totp_secret)
         self.lsf_url = "https://www.lsf.tu-dortmund.de/qisserver/rds?state=wscheck&wscheck=leistungen&navigationPosition=functions%2CmyLecturesWScheck&breadcrumb=myLectures&topitem=functions&subitem=myLecturesWScheck"
@@ -289,5 +297,6 @@ class LsfScraper(BossScraper):
             logger.error(f"LSF Scraper Error: {e}")
             return {"success": False, "error": str(e)}
         finally:
+            self._close_http()
             if self.driver:
                 self.driver.quit()
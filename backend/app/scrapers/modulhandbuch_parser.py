@@ -1,17 +1,30 @@
 """
 Modulhandbuch PDF Parser - Extracts module requirements from curriculum PDFs.
 
-Uses pdfplumber for layout-based text extraction, suitable for
+Uses PyMuPDF for text extraction (pdfplumber as fallback), suitable for
 TU Dortmund Informatik faculty Modulhandbuch PDFs.
 
 OPTIMIZED: Only parses first 5 pages (table of contents) for efficiency.
 """
 
+import bisect
+import hashlib
+import io
 import logging
+import os
 import re
 import tempfile
+import time
+from email.utils import formatdate
 from typing import Dict, List, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
+
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+    fitz = None
 
 try:
     import pdfplumber
@@ -20,10 +33,60 @@ except ImportError:
     PDFPLUMBER_AVAILABLE = False
     pdfplumber = None
 
+try:
+    import ahocorasick  # pyahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+    ahocorasick = None
+
 import requests
 
+from app.utils.ttl_cache import ExpiringCache
+
 logger = logging.getLogger(__name__)
 
+# Parsed requirements per PDF URL; repeat calls skip the download check and the text extraction
+PARSED_CACHE_TTL = 24 * 3600  # 24 hours
+_parsed_cache = ExpiringCache(maxsize=16, ttl=PARSED_CACHE_TTL)
+
+# Pattern to match module entries like:
+# INF-BSc-101:Rechnerstrukturen(RS) . . . 5
+# The module name is the first non-whitespace word(s) after the colon
+# Using \S+ to capture contiguous module name before dots/spaces
+# (\s* tolerates the space PyMuPDF may keep after the colon where pdfplumber squeezes it out)
+# Another faculty's catalogue (see the commented-out routes) only needs its ID prefix added here
+MODULE_ID_PREFIXES = ('INF-BSc', 'INF-Math', 'INF-ETIT')
+_MODULE_RE = re.compile(r'((?:%s)-\d+):\s*(\S+)' % '|'.join(re.escape(p) for p in MODULE_ID_PREFIXES))
+
+# Section headers that start each category in the TOC, found in one case-insensitive scan
+_SECTION_MARKERS = {
+    'wahlpflichtmodule': 'Wahlpflicht',
+    'katalog': 'Wahlpflicht',  # "Katalog Konzepte für Software" etc
+    'fachprojekte': 'Fachprojekt',
+    'wahlmodule ': 'Wahlmodul',  # Space to avoid matching 'wahlpflichtmodule'
+}
+_MARKER_RE = re.compile('|'.join(re.escape(m) for m in _SECTION_MARKERS), re.IGNORECASE)
+
+# Aho-Corasick automaton over the same markers: one pass regardless of how many markers there are
+if AHOCORASICK_AVAILABLE:
+    _MARKER_AC = ahocorasick.Automaton()
+    for _marker in _SECTION_MARKERS:
+        _MARKER_AC.add_word(_marker, _marker)
+    _MARKER_AC.make_automaton()
+else:
+    _MARKER_AC = None
+
+
+def _iter_section_markers(text: str):
+    """Yield (start, marker) for every section marker in text, in text order."""
+    if _MARKER_AC is not None:
+        for end_idx, marker in _MARKER_AC.iter(text.lower()):
+            yield end_idx - len(marker) + 1, marker
+    else:
+        for match in _MARKER_RE.finditer(text):
+            yield match.start(), match.group(0).lower()
+
 
 @dataclass
 class Module:
@@ -35,6 +98,16 @@ class Module:
     semester: Optional[str] = None
     area: Optional[str] = None
 
+    def to_dict(self) -> Dict:
+        return {
+            'module_id': self.module_id,
+            'name': self.name,
+            'ects': self.ects,
+            'category': self.category,
+            'semester': self.semester,
+            'area': self.area,
+        }
+
 
 @dataclass
 class CurriculumRequirements:
@@ -60,24 +133,74 @@ class ModulhandbuchParser:
         'Wahlmodul': 4,    # Wahlmodule typically 4 ECTS
     }
     
+    # The TOC pages sit near the start of the file; both PDF backends repair the missing xref on open
+    PARTIAL_DOWNLOAD_BYTES = 512 * 1024
+    
+    # Downloaded PDFs are reused across calls; older copies are revalidated with a conditional HEAD
+    CACHE_MAX_AGE = 24 * 3600
+    
     def __init__(self, pdf_url: str):
         """Initialize parser with PDF URL."""
         self.pdf_url = pdf_url
         self.pdf_path: Optional[str] = None
+        self.pdf_bytes: Optional[bytes] = None  # Contents of a fresh download, parsed without re-reading pdf_path
+        self.is_partial = False  # True when pdf_path holds only the first PARTIAL_DOWNLOAD_BYTES
         self._pages_cache: Optional[List[str]] = None
+        self._page_count: Optional[int] = None  # Page count reported by the last extraction
+        # One file per URL in the temp dir; the Modulhandbuch URL is stable for a PO version
+        url_key = hashlib.sha1(pdf_url.encode()).hexdigest()
+        self.cache_path = os.path.join(tempfile.gettempdir(), f"mhb_{url_key}.pdf")
+    
+    def _use_cached_pdf(self) -> bool:
+        """Point pdf_path at the on-disk copy if there is one that is still current."""
+        try:
+            stat = os.stat(self.cache_path)
+        except OSError:
+            return False
+        
+        if time.time() - stat.st_mtime > self.CACHE_MAX_AGE:
+            try:
+                response = requests.head(
+                    self.pdf_url,
+                    headers={"If-Modified-Since": formatdate(stat.st_mtime, usegmt=True)},
+                    timeout=10,
+                    allow_redirects=True,
+                )
+            except requests.RequestException as e:
+                logger.warning(f"Could not revalidate cached PDF: {e}")
+                return False
+            if response.status_code != 304:
+                return False
+            os.utime(self.cache_path)  # Restart the max-age window
+        
+        self.pdf_path = self.cache_path
+        self.pdf_bytes = None
+        # A Range download is exactly PARTIAL_DOWNLOAD_BYTES long; anything else is the whole file
+        self.is_partial = stat.st_size == self.PARTIAL_DOWNLOAD_BYTES
+        logger.info(f"Using cached PDF: {self.cache_path}")
+        return True
         
-    def download_pdf(self) -> bool:
-        """Download PDF to temporary file."""
+    def download_pdf(self, partial: bool = True) -> bool:
+        """Download PDF to the URL's cache file, by default only its leading bytes via a Range request."""
+        if partial and self._use_cached_pdf():
+            return True
         try:
             logger.info(f"Downloading PDF: {self.pdf_url}")
-            response = requests.get(self.pdf_url, timeout=30)
-            response.raise_for_status()
+            headers = {"Range": f"bytes=0-{self.PARTIAL_DOWNLOAD_BYTES - 1}"} if partial else None
+            with requests.get(self.pdf_url, headers=headers, stream=True, timeout=30) as response:
+                response.raise_for_status()
+                # Servers without Range support answer 200 with the whole file
+                self.is_partial = response.status_code == 206
+                pdf_bytes = b"".join(response.iter_content(64 * 1024))
             
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as f:
-                f.write(response.content)
-                self.pdf_path = f.name
+            # Kept for later parsers; written next to the cache file and renamed so readers never see half a PDF
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf', dir=tempfile.gettempdir()) as f:
+                f.write(pdf_bytes)
+            os.replace(f.name, self.cache_path)
+            self.pdf_path = self.cache_path
+            self.pdf_bytes = pdf_bytes
             
-            logger.info(f"PDF downloaded to: {self.pdf_path}")
+            logger.info(f"PDF downloaded to: {self.pdf_path} ({'partial' if self.is_partial else 'complete'})")
             return True
             
         except Exception as e:
@@ -89,28 +212,67 @@ class ModulhandbuchParser:
         if self._pages_cache:
             return self._pages_cache
             
-        if not PDFPLUMBER_AVAILABLE:
-            logger.error("pdfplumber not available - cannot parse PDF")
+        if not PYMUPDF_AVAILABLE and not PDFPLUMBER_AVAILABLE:
+            logger.error("Neither PyMuPDF nor pdfplumber available - cannot parse PDF")
             return []
         
         if not self.pdf_path and not self.download_pdf():
             return []
         
-        try:
-            pages_text = []
-            with pdfplumber.open(self.pdf_path) as pdf:
-                logger.info(f"PDF has {len(pdf.pages)} pages, extracting first {max_pages}")
-                for page in pdf.pages[:max_pages]:
-                    text = page.extract_text() or ""
-                    pages_text.append(text)
-            
+        pages_text = self._extract_pages(max_pages)
+        
+        # Every page we asked for must have text; otherwise part of the TOC lay past the
+        # downloaded prefix (e.g. a non-linearized PDF or a large cover image)
+        expected = min(max_pages, self._page_count or max_pages)
+        if self.is_partial and sum(1 for text in pages_text if text.strip()) < expected:
+            logger.info("Partial PDF incomplete, downloading the complete file")
+            if not self.download_pdf(partial=False):
+                return []
+            pages_text = self._extract_pages(max_pages)
+        
+        if pages_text:
             self._pages_cache = pages_text
-            return pages_text
-            
+            self.pdf_bytes = None  # Only the extracted text is needed from here on
+        return pages_text
+    
+    def _extract_pages(self, max_pages: int) -> List[str]:
+        """Text of the first pages of pdf_path with the best available backend ([] on failure)."""
+        self._page_count = None
+        try:
+            if PYMUPDF_AVAILABLE:
+                return self._extract_with_pymupdf(max_pages)
+            return self._extract_with_pdfplumber(max_pages)
         except Exception as e:
-            logger.error(f"Failed to extract PDF text: {e}")
+            log = logger.info if self.is_partial else logger.error
+            log(f"Failed to extract PDF text: {e}")
             return []
     
+    def _extract_with_pymupdf(self, max_pages: int) -> List[str]:
+        """Plain reading-order text via PyMuPDF; far cheaper than pdfminer's layout analysis."""
+        if self.pdf_bytes is not None:
+            doc = fitz.open(stream=self.pdf_bytes, filetype="pdf")
+        else:
+            doc = fitz.open(self.pdf_path)
+        try:
+            self._page_count = doc.page_count
+            logger.info(f"PDF has {doc.page_count} pages, extracting first {max_pages}")
+            return [doc.load_page(i).get_text("text") for i in range(min(max_pages, doc.page_count))]
+        finally:
+            doc.close()
+    
+    def _extract_with_pdfplumber(self, max_pages: int) -> List[str]:
+        """Fallback when PyMuPDF isn't installed."""
+        pages_text = []
+        # pages= keeps pdfplumber from building Page objects for the rest of the document
+        source = io.BytesIO(self.pdf_bytes) if self.pdf_bytes is not None else self.pdf_path
+        with pdfplumber.open(source, pages=list(range(1, max_pages + 1))) as pdf:
+            self._page_count = len(pdf.pages)  # Capped at max_pages by pages=
+            logger.info(f"Extracting first {max_pages} pages")
+            for page in pdf.pages:
+                text = page.extract_text() or ""
+                pages_text.append(text)
+        return pages_text
+    
     def extract_modules(self) -> List[Module]:
         """
         Extract module information from PDF table of contents.
@@ -126,58 +288,38 @@ class ModulhandbuchParser:
         
         modules = []
         
-        # Pattern to match module entries like:
-        # INF-BSc-101:Rechnerstrukturen(RS) . . . 5
-        # The module name is the first non-whitespace word(s) after the colon
-        # Using \S+ to capture contiguous module name before dots/spaces
-        module_pattern = re.compile(
-            r'(INF-(?:BSc|Math|ETIT)-\d+):(\S+)',
-            re.MULTILINE
-        )
-        
         # Build category ranges by finding section headers
         category_ranges = []  # (start_pos, category)
         
-        # Find section markers in the text (case insensitive)
-        text_lower = full_text.lower()
-        
-        # Look for key section headers
-        markers = [
-            ('wahlpflichtmodule', 'Wahlpflicht'),
-            ('katalog', 'Wahlpflicht'),  # "Katalog Konzepte für Software" etc
-            ('fachprojekte', 'Fachprojekt'),
-            ('wahlmodule ', 'Wahlmodul'),  # Space to avoid matching 'wahlpflichtmodule'
-        ]
-        
-        for marker, category in markers:
-            pos = text_lower.find(marker)
+        # Find the first occurrence of each section marker (case insensitive) in a single pass
+        seen_markers = set()
+        for pos, marker in _iter_section_markers(full_text):
+            if marker in seen_markers:
+                continue
+            seen_markers.add(marker)
             if pos > 0:
-                category_ranges.append((pos, category))
-                logger.debug(f"Found '{marker}' at position {pos} -> {category}")
+                category_ranges.append((pos, _SECTION_MARKERS[marker]))
+                logger.debug(f"Found '{marker}' at position {pos} -> {_SECTION_MARKERS[marker]}")
+            if len(seen_markers) == len(_SECTION_MARKERS):
+                break
         
-        # Sort by position
-        category_ranges.sort(key=lambda x: x[0])
+        # Markers come out in text order, so category_ranges is already sorted by position
+        category_starts = [pos for pos, _ in category_ranges]
         
         # Find all module matches
-        for match in module_pattern.finditer(full_text):
-            module_id = match.group(1).strip()
-            raw_name = match.group(2).strip()
+        for match in _MODULE_RE.finditer(full_text):
+            module_id = match.group(1)
             
-            # Clean up the name
-            # Remove trailing dots, page numbers, and whitespace
-            name = re.sub(r'[\.\s]+$', '', raw_name)  # Remove trailing dots/spaces
-            name = re.sub(r'\s+', ' ', name)  # Normalize whitespace
+            # Clean up the name: the \S+ capture has no whitespace, so only trailing leader dots remain
+            name = match.group(2).rstrip('.')
             
             # Skip if name is too short
             if len(name) < 3:
                 continue
             
-            # Determine category based on position in text
-            match_pos = match.start()
-            current_cat = 'Pflicht'  # Default
-            for pos, cat in category_ranges:
-                if pos <= match_pos:
-                    current_cat = cat
+            # Determine category based on position in text: the last section header before the match
+            idx = bisect.bisect_right(category_starts, match.start()) - 1
+            current_cat = category_ranges[idx][1] if idx >= 0 else 'Pflicht'  # Default
             
             # Get default ECTS for this category
             ects = self.DEFAULT_ECTS.get(current_cat, 4)
@@ -202,22 +344,28 @@ class ModulhandbuchParser:
             logger.warning("No modules extracted from PDF")
             return None
         
-        # Separate by category
-        mandatory = [m for m in modules if m.category == "Pflicht"]
-        wahlpflicht = [m for m in modules if m.category == "Wahlpflicht"]
-        fachprojekte = [m for m in modules if m.category == "Fachprojekt"]
-        wahlmodule = [m for m in modules if m.category == "Wahlmodul"]
+        # Separate by category and sum ECTS in one pass; electives are grouped by area per category
+        mandatory = []
+        mandatory_ects = 0
+        elective_by_category: Dict[str, Dict[str, int]] = {"Wahlpflicht": {}, "Fachprojekt": {}, "Wahlmodul": {}}
+        for m in modules:
+            if m.category == "Pflicht":
+                mandatory.append(m)
+                mandatory_ects += m.ects
+                continue
+            areas = elective_by_category.get(m.category)
+            if areas is not None:
+                area = m.area or "Allgemeiner Wahlpflichtbereich"
+                areas[area] = areas.get(area, 0) + m.ects
         
-        # Group electives by area and calculate required ECTS
+        # Merge in category order so elective_areas keeps its Wahlpflicht/Fachprojekt/Wahlmodul ordering
         elective_areas: Dict[str, int] = {}
-        for m in wahlpflicht + fachprojekte + wahlmodule:
-            area = m.area or "Allgemeiner Wahlpflichtbereich"
-            if area not in elective_areas:
-                elective_areas[area] = 0
-            elective_areas[area] += m.ects
+        for areas in elective_by_category.values():
+            for area, ects in areas.items():
+                elective_areas[area] = elective_areas.get(area, 0) + ects
         
         # Calculate total (Bachelor typically 180 ECTS)
-        total_ects = sum(m.ects for m in mandatory) + sum(elective_areas.values())
+        total_ects = mandatory_ects + sum(elective_areas.values())
         
         return CurriculumRequirements(
             mandatory_modules=mandatory,
@@ -239,7 +387,7 @@ class ModulhandbuchParser:
             }
         
         return {
-            "mandatory_modules": [asdict(m) for m in req.mandatory_modules],
+            "mandatory_modules": [m.to_dict() for m in req.mandatory_modules],
             "elective_areas": req.elective_areas,
             "total_ects": req.total_ects,
             "source_pdf": req.source_pdf
@@ -256,8 +404,17 @@ def parse_modulhandbuch(pdf_url: str) -> Dict:
     Returns:
         Dict with parsed requirements or error
     """
-    if not PDFPLUMBER_AVAILABLE:
-        return {"error": "pdfplumber not installed", "modules": []}
+    if not PYMUPDF_AVAILABLE and not PDFPLUMBER_AVAILABLE:
+        return {"error": "No PDF backend installed (PyMuPDF or pdfplumber)", "modules": []}
+    
+    cached = _parsed_cache.get(pdf_url)
+    if cached is not None:
+        return cached
     
     parser = ModulhandbuchParser(pdf_url)
-    return parser.to_dict()
+    result = parser.to_dict()
+    # The empty fallback structure isn't cached, so a failed download is retried next time.
+    # Neither is anything parsed from a partial download, which may have missed TOC pages.
+    if (result["mandatory_modules"] or result["elective_areas"]) and not parser.is_partial:
+        _parsed_cache[pdf_url] = result
+    return result
@@ -6,6 +6,23 @@ from app.services.gemini_engine import get_supabase
 logger = logging.getLogger(__name__)
 
 class AcademicService:
+    async def _upsert_rows(self, supabase, table: str, rows: List[Dict], on_conflict: str, label: str):
+        """Upsert all rows in one request; if the batch is rejected, retry row by row so one bad row can't drop the rest."""
+        if not rows:
+            return
+        try:
+            await supabase.table(table).upsert(rows, on_conflict=on_conflict).execute()
+            return
+        except Exception as e:
+            logger.warning(f"Batch upsert into {table} failed, retrying per row: {e}")
+        for row in rows:
+            try:
+                await supabase.table(table).upsert(row, on_conflict=on_conflict).execute()
+            except Exception as e:
+                logger.error(f"Error during {table} upsert: {e}")
+                if hasattr(e, 'message'): logger.error(f"Supabase Error Message: {e.message}")
+                logger.warning(f"Failed to upsert {label} '{row.get(label)}': {e}")
+
     async def save_deadlines(self, user_uuid: str, deadlines: List[Dict]):
         """Persists Moodle deadlines to database."""
         if not deadlines:
@@ -14,24 +31,21 @@ class AcademicService:
         supabase = await get_supabase()
         logger.info(f"Saving {len(deadlines)} deadlines for user {user_uuid}")
         
+        # Upsert based on user_id, activity_name, and due_date. Keyed by the conflict columns so a
+        # duplicate keeps the last entry (as sequential upserts did) instead of failing the batch.
+        rows = {}
         for d in deadlines:
-            try:
-                # Upsert based on user_id, activity_name, and due_date
-                # We need to ensure due_date is handled correctly if null
-                if not d.get("activity_name") or not d.get("due_date"):
-                    continue
-                    
-                await supabase.table("student_deadlines").upsert({
-                    "user_id": user_uuid,
-                    "activity_name": d["activity_name"],
-                    "course_name": d.get("course_name"),
-                    "due_date": d.get("due_date"),
-                    "url": d.get("url")
-                }, on_conflict="user_id, activity_name, due_date").execute()
-            except Exception as e:
-                logger.error(f"Error during student_deadlines upsert: {e}")
-                if hasattr(e, 'message'): logger.error(f"Supabase Error Message: {e.message}")
-                logger.warning(f"Failed to upsert deadline '{d.get('activity_name')}': {e}")
+            if not d.get("activity_name") or not d.get("due_date"):
+                continue
+            rows[(d["activity_name"], d["due_date"])] = {
+                "user_id": user_uuid,
+                "activity_name": d["activity_name"],
+                "course_name": d.get("course_name"),
+                "due_date": d.get("due_date"),
+                "url": d.get("url")
+            }
+        await self._upsert_rows(supabase, "student_deadlines", list(rows.values()),
+                                "user_id, activity_name, due_date", "activity_name")
 
     async def save_grades(self, user_uuid: str, grades: List[Dict], summary_data: Dict):
         """Persists BOSS grades and profile summary to database."""
@@ -53,26 +67,27 @@ class AcademicService:
             if hasattr(e, 'message'): logger.error(f"Supabase Error Message: {e.message}")
             logger.warning(f"Failed to update academic profile for {user_uuid}: {e}")
 
-        # 2. Save Grades
-        if grades:
-            for g in grades:
-                try:
-                    if not g.get("title") and not g.get("exam_title"):
-                        continue
-                        
-                    await supabase.table("student_grades").upsert({
-                        "user_id": user_uuid,
-                        "exam_title": g.get("title", g.get("exam_title")),
-                        "grade": float(g["grade"]) if g.get("grade") is not None and g.get("grade") != "" else None,
-                        "credits": float(g["credits"]) if g.get("credits") is not None and g.get("credits") != "" else 0.0,
-                        "status": g.get("status"),
-                        "is_passed": g.get("passed", False),
-                        "semester": g.get("semester")
-                    }, on_conflict="user_id, exam_title, semester").execute()
-                except Exception as e:
-                    logger.error(f"Error during student_grades upsert: {e}")
-                    if hasattr(e, 'message'): logger.error(f"Supabase Error Message: {e.message}")
-                    logger.warning(f"Failed to upsert grade '{g.get('title')}': {e}")
+        # 2. Save Grades (one row per exam_title/semester, last one wins like sequential upserts)
+        rows = {}
+        for g in grades or []:
+            if not g.get("title") and not g.get("exam_title"):
+                continue
+            try:
+                row = {
+                    "user_id": user_uuid,
+                    "exam_title": g.get("title", g.get("exam_title")),
+                    "grade": float(g["grade"]) if g.get("grade") is not None and g.get("grade") != "" else None,
+                    "credits": float(g["credits"]) if g.get("credits") is not None and g.get("credits") != "" else 0.0,
+                    "status": g.get("status"),
+                    "is_passed": g.get("passed", False),
+                    "semester": g.get("semester")
+                }
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Failed to upsert grade '{g.get('title')}': {e}")
+                continue
+            rows[(row["exam_title"], row["semester"])] = row
+        await self._upsert_rows(supabase, "student_grades", list(rows.values()),
+                                "user_id, exam_title, semester", "exam_title")
 
     async def get_academic_summary(self, user_uuid: str) -> str:
         """Constructs a text summary for Gemini context."""
@@ -0,0 +1,87 @@
+"""
+Per-user chat history kept in process memory with a sliding TTL.
+"""
+
+import heapq
+from collections import deque
+from itertools import islice
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+
+class ConversationMemory:
+    """In-memory conversation storage with 24-hour TTL per user.
+
+    Only used from async handlers on the event loop and never awaits inside a
+    method, so no lock is needed.
+    """
+    
+    def __init__(self, ttl_hours: int = 24):
+        # user_id -> {messages: deque, lines: deque, transcripts: {n: str}, last_access: datetime}
+        self._store: Dict[str, Dict] = {}
+        self._ttl = timedelta(hours=ttl_hours)
+        # (expiry, user_id) with one entry per stored user, so cleanup only touches users that are due
+        self._expiry_heap: List[tuple] = []
+    
+    def _cleanup_expired(self, now: datetime):
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, uid = heapq.heappop(self._expiry_heap)
+            data = self._store.get(uid)
+            if data is None:
+                continue
+            expiry = data['last_access'] + self._ttl
+            # Same test as the loop condition, or an entry due exactly now would be re-pushed forever
+            if expiry <= now:
+                del self._store[uid]
+            else:
+                # Accessed since this entry was scheduled; check again at the new expiry
+                heapq.heappush(self._expiry_heap, (expiry, uid))
+    
+    def add_message(self, user_id: str, role: str, content: str):
+        now = datetime.now()
+        self._cleanup_expired(now)
+        entry = self._store.get(user_id)
+        if entry is None:
+            # Keep only last 20 messages; the deque drops the oldest on append
+            entry = self._store[user_id] = {
+                'messages': deque(maxlen=20), 'lines': deque(maxlen=20), 'transcripts': {}, 'last_access': now
+            }
+            heapq.heappush(self._expiry_heap, (now + self._ttl, user_id))
+        entry['messages'].append({
+            'role': role,
+            'content': content,
+            'timestamp': now.isoformat()
+        })
+        # Prompt lines are rendered once here; transcripts built from them stay valid until the next message
+        entry['lines'].append(f"{'User' if role == 'user' else 'Ayla'}: {content}")
+        entry['transcripts'].clear()
+        entry['last_access'] = now
+    
+    def get_history(self, user_id: str) -> List[Dict]:
+        now = datetime.now()
+        self._cleanup_expired(now)
+        entry = self._store.get(user_id)
+        if entry is None:
+            return []
+        entry['last_access'] = now
+        return list(entry['messages'])
+    
+    def get_transcript(self, user_id: str, last_n: int) -> str:
+        """The last last_n messages as "User: ..." / "Ayla: ..." prompt lines joined by blank lines."""
+        now = datetime.now()
+        self._cleanup_expired(now)
+        entry = self._store.get(user_id)
+        if entry is None:
+            return ""
+        entry['last_access'] = now
+        transcript = entry['transcripts'].get(last_n)
+        if transcript is None:
+            lines = entry['lines']
+            transcript = entry['transcripts'][last_n] = "\n\n".join(islice(lines, max(0, len(lines) - last_n), None))
+        return transcript
+    
+    def message_count(self, user_id: str) -> int:
+        # Swept like the readers, so an expired conversation reports 0 rather than its stale length
+        self._cleanup_expired(datetime.now())
+        entry = self._store.get(user_id)
+        return len(entry['messages']) if entry is not None else 0
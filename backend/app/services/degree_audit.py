@@ -7,11 +7,15 @@ from Modulhandbuch to calculate missing modules and remaining credits.
 """
 
 import logging
+import re
+from functools import lru_cache
 from typing import Dict, List, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
+_DIGITS_RE = re.compile(r'\d+')
+
 
 @dataclass
 class MissingModule:
@@ -21,6 +25,9 @@ class MissingModule:
     ects: int
     category: str
 
+    def to_dict(self) -> Dict:
+        return {'module_id': self.module_id, 'name': self.name, 'ects': self.ects, 'category': self.category}
+
 
 @dataclass
 class ElectiveStatus:
@@ -31,6 +38,15 @@ class ElectiveStatus:
     remaining_ects: int
     suggestions: List[str]
 
+    def to_dict(self) -> Dict:
+        return {
+            'area_name': self.area_name,
+            'required_ects': self.required_ects,
+            'completed_ects': self.completed_ects,
+            'remaining_ects': self.remaining_ects,
+            'suggestions': list(self.suggestions),
+        }
+
 
 @dataclass
 class AuditResult:
@@ -44,6 +60,7 @@ class AuditResult:
     completed_modules: List[Dict]
 
 
+@lru_cache(maxsize=4096)
 def normalize_module_id(module_id: str) -> str:
     """
     Normalize module ID for comparison.
@@ -57,14 +74,35 @@ def normalize_module_id(module_id: str) -> str:
     normalized = normalized.replace("-", "").replace(" ", "")
     
     # Extract just the numeric part if present
-    import re
-    numbers = re.findall(r'\d+', normalized)
+    numbers = _DIGITS_RE.search(normalized)
     if numbers:
-        return numbers[0]
+        return numbers.group(0)
     
     return normalized
 
 
+def _exam_passed(exam: Dict) -> bool:
+    """Classify a single BOSS exam row as passed or not.
+
+    1. If 'nicht bestanden' or 'failed' in status -> False (regardless of grade, usually)
+    2. Else if grade <= 4.0 (German grading: 1.0 to 4.0 is passed, 5.0 is failed) -> True
+    3. Else if 'bestanden' or 'passed' in status -> True
+    """
+    grade = exam.get('grade')  # float or None per the scraper contract
+    status = exam.get('status')
+    
+    # Without a status there is nothing to override the grade, so skip the string checks
+    if not status:
+        return bool(grade) and grade <= 4.0
+    
+    status = status.lower()
+    if 'nicht bestanden' in status or 'failed' in status:
+        return False
+    if grade and grade <= 4.0:
+        return True
+    return 'bestanden' in status or 'passed' in status
+
+
 def perform_audit(
     passed_exams: List[Dict],
     curriculum: Dict,
@@ -76,6 +114,7 @@ def perform_audit(
     Args:
         passed_exams: List of exam dicts from BOSS scraper
             Each should have: title, exam_id, grade, credits, status
+            (grade is a float or None, as produced by BossScraper)
         curriculum: Parsed curriculum from ModulhandbuchParser
             Should have: mandatory_modules, elective_areas, total_ects
         degree_identity: Degree info from BOSS
@@ -85,70 +124,39 @@ def perform_audit(
         Dict with audit results
     """
     
-    # Build set of passed exam IDs (normalized)
-    passed_ids = set()
+    # Index passed exams by normalized ID
     passed_by_id = {}
     total_earned = 0
     
-    for exam in passed_exams:
-        # Check if passed (grade <= 4.0 for German grading, or status == "bestanden")
-        grade = exam.get('grade')
-        status = exam.get('status', '').lower()
-        
-        is_passed = False
-        # German grading: 1.0 to 4.0 is passed, 5.0 is failed.
-        if grade and isinstance(grade, (int, float)):
-             if grade <= 4.0:
-                 is_passed = True
-        
-        # If passed via grade check, we are good.
-        # If not (e.g. grade is 5.0), we should NOT check status unless stricter.
-        # But sometimes grade is missing.
-        
-        # Proper Logic:
-        # 1. If 'nicht bestanden' or 'failed' in status -> False (regardless of grade, usually)
-        # 2. Else if grade <= 4.0 -> True
-        # 3. Else if 'bestanden' in status -> True
-        
-        if 'nicht bestanden' in status or 'failed' in status:
-            is_passed = False
-        elif grade and isinstance(grade, (int, float)) and grade <= 4.0:
-            is_passed = True
-        elif 'bestanden' in status or 'passed' in status:
-            is_passed = True
-        
-        if is_passed:
-            exam_id = normalize_module_id(exam.get('exam_id', ''))
-            if exam_id:
-                passed_ids.add(exam_id)
-                passed_by_id[exam_id] = exam
-                total_earned += exam.get('credits', 0) or 0
+    # The pass/fail classification acts as a mask; only passed exams reach the ID bookkeeping
+    for exam in filter(_exam_passed, passed_exams):
+        exam_id = normalize_module_id(exam.get('exam_id', ''))
+        if exam_id:
+            passed_by_id[exam_id] = exam
+            total_earned += exam.get('credits') or 0
+    passed_ids = frozenset(passed_by_id)
     
     logger.info(f"Found {len(passed_ids)} passed exams with {total_earned} ECTS")
     
     # Get mandatory modules from curriculum
     mandatory_modules = curriculum.get('mandatory_modules', [])
-    mandatory_ids = set()
-    mandatory_by_id = {}
-    
-    for module in mandatory_modules:
-        mod_id = normalize_module_id(module.get('module_id', ''))
-        if mod_id:
-            mandatory_ids.add(mod_id)
-            mandatory_by_id[mod_id] = module
-    
-    # Calculate missing mandatory modules
-    missing_ids = mandatory_ids - passed_ids
-    missing_mandatory = []
-    
-    for mod_id in missing_ids:
-        module = mandatory_by_id.get(mod_id, {})
-        missing_mandatory.append(MissingModule(
+    mandatory_by_id = {
+        mod_id: module
+        for module in mandatory_modules
+        if (mod_id := normalize_module_id(module.get('module_id', '')))
+    }
+    
+    # Calculate missing mandatory modules in one pass over the indexed curriculum
+    missing_mandatory = [
+        MissingModule(
             module_id=module.get('module_id', mod_id),
             name=module.get('name', 'Unknown Module'),
             ects=module.get('ects', 0),
             category='Pflicht'
-        ))
+        )
+        for mod_id, module in mandatory_by_id.items()
+        if mod_id not in passed_ids
+    ]
     
     logger.info(f"Missing {len(missing_mandatory)} mandatory modules")
     
@@ -188,7 +196,7 @@ def perform_audit(
         progress_percentage=round(progress, 1),
         missing_mandatory=missing_mandatory,
         elective_status=elective_status,
-        completed_modules=[passed_by_id[pid] for pid in passed_ids if pid in passed_by_id]
+        completed_modules=list(passed_by_id.values())
     )
     
     return {
@@ -202,34 +210,34 @@ def perform_audit(
             'total_credits_earned': result.total_credits_earned,
             'total_credits_required': result.total_credits_required,
             'progress_percentage': result.progress_percentage,
-            'missing_mandatory': [asdict(m) for m in result.missing_mandatory],
-            'elective_status': [asdict(e) for e in result.elective_status],
+            'missing_mandatory': [m.to_dict() for m in result.missing_mandatory],
+            'elective_status': [e.to_dict() for e in result.elective_status],
             'completed_count': len(result.completed_modules)
         }
     }
 
 
+# Default requirements for common degrees, used by quick_audit
+DEFAULT_REQUIREMENTS = {
+    'Bachelor': {
+        'total_ects': 180,
+        'mandatory_modules': [],
+        'elective_areas': {'Wahlpflichtbereich': 30}
+    },
+    'Master': {
+        'total_ects': 120,
+        'mandatory_modules': [],
+        'elective_areas': {'Wahlpflichtbereich': 30}
+    }
+}
+
+
 def quick_audit(passed_exams: List[Dict], degree_identity: Dict) -> Dict:
     """
     Perform a quick audit without PDF parsing.
     
     Uses default curriculum requirements based on degree type.
     """
-    
-    # Default requirements for common degrees
-    DEFAULT_REQUIREMENTS = {
-        'Bachelor': {
-            'total_ects': 180,
-            'mandatory_modules': [],
-            'elective_areas': {'Wahlpflichtbereich': 30}
-        },
-        'Master': {
-            'total_ects': 120,
-            'mandatory_modules': [],
-            'elective_areas': {'Wahlpflichtbereich': 30}
-        }
-    }
-    
     degree_type = degree_identity.get('degree_type', 'Bachelor')
     curriculum = DEFAULT_REQUIREMENTS.get(degree_type, DEFAULT_REQUIREMENTS['Bachelor'])
     
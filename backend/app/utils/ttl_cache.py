@@ -0,0 +1,67 @@
+"""
+Fixed-TTL in-process cache with a single dict lookup on the hit path.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Tuple
+
+_MISSING = object()
+
+
+class ExpiringCache:
+    """Bounded mapping whose entries expire ttl seconds after they were last set.
+
+    Every entry shares the same TTL and moves to the back on each write, so
+    insertion order is also expiry order: sweeping and evicting only ever look
+    at the front. Expired entries are swept on writes, and reads just compare
+    the stored deadline.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: 'OrderedDict[Hashable, Tuple[Any, float]]' = OrderedDict()
+
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is None or item[1] <= time.monotonic():
+            return default
+        return item[0]
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __setitem__(self, key, value):
+        now = time.monotonic()
+        data = self._data
+        data[key] = (value, now + self.ttl)
+        # Renewed keys go to the back, keeping insertion order == expiry order
+        data.move_to_end(key)
+        self._sweep(now)
+        while len(data) > self.maxsize:
+            data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        item = self._data.pop(key, None)
+        if item is None or item[1] <= time.monotonic():
+            return default
+        return item[0]
+
+    def __len__(self) -> int:
+        self._sweep(time.monotonic())
+        return len(self._data)
+
+    def _sweep(self, now: float):
+        data = self._data
+        while data:
+            key, (_, expires) = next(iter(data.items()))
+            if expires > now:
+                break
+            del data[key]
@@ -1,6 +1,9 @@
 import os
+import queue
 import logging
-from webdriver_manager.chrome import ChromeDriverManager
+
+# Selenium and webdriver_manager are imported inside the functions that drive Chrome:
+# main.py imports this module at startup and shouldn't pay for loading them there
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +14,7 @@ def get_cached_driver_path():
     global _cached_driver_path
     if _cached_driver_path is None:
         logger.info("Initializing ChromeDriver path...")
+        from webdriver_manager.chrome import ChromeDriverManager
         try:
             driver_path = ChromeDriverManager().install()
             # Fix for WDM behavior where it returns THIRD_PARTY_NOTICES
@@ -24,3 +28,86 @@ def get_cached_driver_path():
             logger.error(f"Failed to install/find ChromeDriver: {e}")
             raise
     return _cached_driver_path
+
+
+class BrowserPool:
+    """Warm headless Chrome drivers for scrapers that start from a blank session.
+
+    acquire() never blocks: when the pool is empty it returns None and the
+    scraper launches its own driver as before. Drivers are wiped (cookies,
+    storage, cache) before they go back into the pool.
+    """
+
+    def __init__(self, size=2):
+        self._idle = queue.Queue(maxsize=size)
+
+    @staticmethod
+    def _new_driver():
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+        chrome_options = Options()
+        chrome_options.add_argument("--headless")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--window-size=1280,720")
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        return webdriver.Chrome(service=Service(get_cached_driver_path()), options=chrome_options)
+
+    def fill(self):
+        """Launch drivers until the pool is full; blocking, meant to run in a worker thread."""
+        while not self._idle.full():
+            try:
+                driver = self._new_driver()
+            except Exception as e:
+                logger.warning(f"Browser pool warm-up stopped: {e}")
+                return
+            try:
+                self._idle.put_nowait(driver)
+            except queue.Full:
+                driver.quit()
+        logger.info(f"Browser pool warmed with {self._idle.qsize()} drivers")
+
+    def acquire(self):
+        """Return an idle, live driver, or None if none is available."""
+        from selenium.common.exceptions import WebDriverException
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+            try:
+                driver.current_url  # Chrome may have died while idle
+                return driver
+            except WebDriverException:
+                _quit_quietly(driver)
+
+    def release(self, driver):
+        """Wipe the session state and return the driver to the pool (or quit it if that fails)."""
+        from selenium.common.exceptions import WebDriverException
+        try:
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except WebDriverException:
+            pass  # about:blank and some error pages have no storage
+        try:
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+            driver.get("about:blank")
+            self._idle.put_nowait(driver)
+        except (WebDriverException, queue.Full):
+            _quit_quietly(driver)
+
+    def close(self):
+        while True:
+            try:
+                _quit_quietly(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+def _quit_quietly(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
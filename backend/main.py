@@ -1,46 +1,43 @@
 import logging
 import time
 import os
+import sys
 import hashlib
+import base64
+import json
+import re
 import asyncio
-from typing import Optional, List, Dict
+import httpx
+import orjson
+from dataclasses import dataclass
+from typing import Optional, Dict
 from contextlib import asynccontextmanager
-from datetime import datetime, timedelta
-import threading
+from datetime import datetime
 
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Depends
+from fastapi import FastAPI, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from sse_starlette.sse import EventSourceResponse
 
-# Scrapers & Tools
-from app.scrapers.boss_scraper import BossScraper
-from app.scrapers.moodle_scraper import MoodleScraper
-from app.scrapers.lsf_scraper import LsfScraper
+# Tools (the Selenium scrapers are imported where they're used, so startup doesn't load Selenium)
 from backend_config import MODEL_NAME
 from app.features.email.email_service import fetch_headers, fetch_body
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from cachetools import TTLCache
 
 # Modern Google GenAI SDK
 from google import genai
 from google.genai import types
-from google.genai import errors as genai_errors
 
 # Workspace API router
 from app.routers.workspace_router import router as workspace_router, username_to_uuid
 from app.routers import stream_chat, webhooks, audio_chat, assistant_router, calendar_router
 from app.auth import supabase_auth
 from app.services.academic_service import AcademicService
+from app.services.conversation_memory import ConversationMemory
+from app.utils.ttl_cache import ExpiringCache
 from app.services.gemini_engine import get_supabase
 
 
@@ -48,99 +45,130 @@ from app.services.gemini_engine import get_supabase
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Canonical Supabase user ids; anything else is a username that gets mapped via username_to_uuid
+_UUID_RE = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.IGNORECASE)
+
 # Configuration moved to backend_config.py
 
 # ============================================
 # MEMORY & CACHING
 # ============================================
 
-class ConversationMemory:
-    """In-memory conversation storage with 24-hour TTL per user."""
-    
-    def __init__(self, ttl_hours: int = 24):
-        self._store: Dict[str, Dict] = {}  # user_id -> {messages: [], last_access: datetime}
-        self._lock = threading.Lock()
-        self._ttl = timedelta(hours=ttl_hours)
-    
-    def _cleanup_expired(self):
-        now = datetime.now()
-        expired = [uid for uid, data in self._store.items() 
-                   if now - data['last_access'] > self._ttl]
-        for uid in expired:
-            del self._store[uid]
-    
-    def add_message(self, user_id: str, role: str, content: str):
-        with self._lock:
-            self._cleanup_expired()
-            if user_id not in self._store:
-                self._store[user_id] = {'messages': [], 'last_access': datetime.now()}
-            
-            self._store[user_id]['messages'].append({
-                'role': role,
-                'content': content,
-                'timestamp': datetime.now().isoformat()
-            })
-            self._store[user_id]['last_access'] = datetime.now()
-            
-            # Keep only last 20 messages
-            if len(self._store[user_id]['messages']) > 20:
-                self._store[user_id]['messages'] = self._store[user_id]['messages'][-20:]
-    
-    def get_history(self, user_id: str) -> List[Dict]:
-        with self._lock:
-            self._cleanup_expired()
-            if user_id in self._store:
-                self._store[user_id]['last_access'] = datetime.now()
-                return self._store[user_id]['messages'].copy()
-            return []
-
 conversation_memory = ConversationMemory(ttl_hours=24)
 
 # User Data Caching
 USER_CACHE_TTL = 86400  # 24 hours
-user_login_cache = TTLCache(maxsize=500, ttl=USER_CACHE_TTL)
-user_grades_cache = TTLCache(maxsize=500, ttl=USER_CACHE_TTL)
-from app.utils.webdriver_utils import get_cached_driver_path, DEBUG_DIR
-
-def get_cache_key(username: str, password: str = "") -> str:
+user_login_cache = ExpiringCache(maxsize=500, ttl=USER_CACHE_TTL)
+user_grades_cache = ExpiringCache(maxsize=500, ttl=USER_CACHE_TTL)
+# username -> cache keys stored for that user, so a refresh without the password stays per-user
+user_cache_keys = ExpiringCache(maxsize=1000, ttl=USER_CACHE_TTL)
+from app.utils.webdriver_utils import BrowserPool
+
+# Warm blank Chrome sessions for Moodle logins; filled in the background at startup
+browser_pool = BrowserPool(size=int(os.getenv("BROWSER_POOL_SIZE", "2")))
+
+# Academic summaries change only when grades/deadlines are saved, so chat turns share them briefly
+ACADEMIC_CONTEXT_TTL = 300  # 5 minutes
+academic_context_cache = ExpiringCache(maxsize=1000, ttl=ACADEMIC_CONTEXT_TTL)
+academic_service = AcademicService()
+
+async def get_academic_context(user_uuid: str) -> str:
+    """Return the academic summary for a user, served from cache between chat turns."""
+    context = academic_context_cache.get(user_uuid)
+    if context is not None:
+        return context
+    context = await academic_service.get_academic_summary(user_uuid)
+    # An empty summary means the lookup failed; don't pin that for the whole TTL
+    if context:
+        academic_context_cache[user_uuid] = context
+    return context
+
+def get_cache_key(username: str, password: str = "") -> bytes:
     """Generate cache key from username and password hash.
     
     This ensures that cached session data is only returned when
     the exact same credentials are provided, preventing auth bypass.
+    The raw 8-byte BLAKE2b digest is used as-is; cache keys only need to be hashable.
+    The caches are in-process only, but the key still has to be a cryptographic
+    hash: with CRC32/xxHash anyone could craft a password colliding with a
+    known username's key and be served that user's cached grades.
     """
     combined = f"{username}:{password}"
-    return hashlib.sha256(combined.encode()).hexdigest()[:16]
+    return hashlib.blake2b(combined.encode(), digest_size=8).digest()
+
+def remember_cache_key(username: str, key: bytes):
+    """Record that key holds cached data for username (re-assigning also renews the index TTL)."""
+    user_cache_keys[username] = user_cache_keys.get(username, frozenset()) | {key}
+
+# Scrapes in flight, by (endpoint, cache key); concurrent duplicates share one run instead of each launching Chrome
+_pending_scrapes: Dict[tuple, asyncio.Task] = {}
+
+async def coalesce_scrape(key: tuple, scrape):
+    """Await scrape() once per key at a time; callers arriving while it runs get the same result."""
+    task = _pending_scrapes.get(key)
+    if task is None:
+        task = asyncio.ensure_future(scrape())
+        _pending_scrapes[key] = task
+        task.add_done_callback(lambda _: _pending_scrapes.pop(key, None))
+    # Shielded so one client disconnecting doesn't cancel the scrape for everyone else
+    return await asyncio.shield(task)
+
+# Strong references to in-flight background writes; the event loop only keeps weak ones
+_background_saves: set = set()
+
+async def _persist_academic_data(save, user_uuid: str):
+    await save
+    # Dropped only after the write lands, so a chat in between can't re-cache the old summary for 5 minutes
+    academic_context_cache.pop(user_uuid, None)
+
+def _log_save_failure(task: asyncio.Task):
+    _background_saves.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background save failed: {task.exception()}")
+
+def persist_in_background(save, user_uuid: str):
+    """Run a Supabase write without holding up the response; failures are logged instead of raised."""
+    task = asyncio.create_task(_persist_academic_data(save, user_uuid))
+    _background_saves.add(task)
+    task.add_done_callback(_log_save_failure)
 
 def invalidate_user_cache(username: str, password: str = ""):
     """Invalidate cached data for a user.
     
     If password is provided, invalidates the specific credential cache.
-    If not provided, clears ALL cache entries (for full refresh).
+    If not provided, invalidates every key recorded for the username (for full refresh).
     """
     if password:
         key = get_cache_key(username, password)
-        if key in user_login_cache: del user_login_cache[key]
-        if key in user_grades_cache: del user_grades_cache[key]
+        user_login_cache.pop(key, None)
+        user_grades_cache.pop(key, None)
         logger.info(f"Cache invalidated for: {username}")
     else:
-        # Clear all cached entries for this user by clearing entire cache
-        # This is a fallback when password is unknown
-        user_login_cache.clear()
-        user_grades_cache.clear()
-        logger.info(f"All caches cleared (force refresh for: {username})")
+        # Password unknown: drop every credential variant cached for this user only
+        for key in user_cache_keys.pop(username, ()):
+            user_login_cache.pop(key, None)
+            user_grades_cache.pop(key, None)
+        logger.info(f"All caches invalidated for: {username}")
 
 # ============================================
 # LIFESPAN & APP SETUP
 # ============================================
 
+# Set once in lifespan; chat endpoints read it directly instead of resolving a dependency per request
+_client: Optional[genai.Client] = None
+# Pooled HTTP/2 client for lightweight upstream calls (the SSO credential probe); also set in lifespan
+_http_client: Optional[httpx.AsyncClient] = None
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    global _client, _http_client
     # Initialize Gemini Client
     api_key = os.getenv("GEMINI_API_KEY")
     if api_key:
         try:
             client = genai.Client(api_key=api_key)
             app.state.genai_client = client
+            _client = client
             logger.info(f"✅ Gemini client initialized for model: {MODEL_NAME}")
         except Exception as e:
             logger.error(f"Failed to initialize Gemini client: {e}")
@@ -148,11 +176,31 @@ async def lifespan(app: FastAPI):
     else:
         logger.warning("GEMINI_API_KEY not set. Chat features will fail.")
         app.state.genai_client = None
+    
+    _http_client = httpx.AsyncClient(http2=True, timeout=10.0)
+    app.state.http_client = _http_client
+    
+    warmup = asyncio.create_task(asyncio.to_thread(browser_pool.fill))
         
     yield
     logger.info("Shutting down...")
+    # Grade and deadline writes already answered as successful; let them land before the clients go away
+    if _background_saves:
+        await asyncio.gather(*_background_saves, return_exceptions=True)
+    await warmup
+    await _http_client.aclose()
+    browser_pool.close()
+    boss_scraper = sys.modules.get("app.scrapers.boss_scraper")
+    if boss_scraper is not None:  # Only has pooled browsers if a grades scrape ran
+        boss_scraper.BossScraper.shutdown()
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; grade and event payloads run to tens of KB."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
 
-app = FastAPI(title="Ayla Backend", lifespan=lifespan)
+app = FastAPI(title="Ayla Backend", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -187,6 +235,7 @@ class ChatRequest(BaseModel):
     user_id: Optional[str] = None
     student_context: Optional[dict] = None
     max_tokens: Optional[int] = 4096
+    stream: bool = False  # True: answer as SSE "text" events instead of one JSON body
 
 class AskAylaRequest(BaseModel):
     question: str
@@ -197,40 +246,32 @@ class AskAylaRequest(BaseModel):
 # DEPENDENCIES
 # ============================================
 
-def get_client(app_instance: FastAPI = Depends(lambda: app)) -> genai.Client:
-    if not hasattr(app_instance.state, "genai_client") or not app_instance.state.genai_client:
+def get_client() -> genai.Client:
+    if _client is None:
         raise HTTPException(status_code=503, detail="Gemini client not initialized")
-    return app_instance.state.genai_client
+    return _client
 
 # ============================================
 # GENERAL CHAT ENDPOINTS (Merged from gemini_api.py)
 # ============================================
 
 @app.post("/ask_ayla")
-async def ask_ayla(
-    request: AskAylaRequest,
-    client: genai.Client = Depends(get_client)
-):
+async def ask_ayla(request: AskAylaRequest):
     """
     Unified Ayla AI endpoint for the floating widget and specialty tasks.
     """
+    client = get_client()
     try:
         user_id = request.student_id or "anonymous"
         messages = []
         
         # 1. Fetch Academic Context from Database (Primary Source)
         # Fix: Always resolve UUID and fetch from DB for rich context (grades, deadlines)
-        try:
-            import uuid as uuid_lib
-            uuid_lib.UUID(user_id)
-            user_uuid = user_id
-        except:
-            user_uuid = username_to_uuid(user_id) if user_id != "anonymous" else None
+        user_uuid = user_id if _UUID_RE.match(user_id) else (username_to_uuid(user_id) if user_id != "anonymous" else None)
             
         academic_context = ""
         if user_uuid:
-            service = AcademicService()
-            academic_context = await service.get_academic_summary(user_uuid)
+            academic_context = await get_academic_context(user_uuid)
             messages.append(academic_context)
         
         # 2. Add Frontend Context (Supplemental/Fallback)
@@ -251,10 +292,9 @@ async def ask_ayla(
             messages.append(f"Today's Date: {datetime.now().strftime('%A, %B %d, %Y')}")
 
         # Add History
-        history = conversation_memory.get_history(user_id)
-        for msg in history[-5:]:
-            role = "User" if msg['role'] == 'user' else "Ayla"
-            messages.append(f"{role}: {msg['content']}")
+        transcript = conversation_memory.get_transcript(user_id, 5)
+        if transcript:
+            messages.append(transcript)
 
         # Current Question
         messages.append(f"User: {request.question}")
@@ -284,32 +324,44 @@ async def ask_ayla(
         logger.error(f"AskAyla error: {e}")
         return {"success": False, "error": str(e)}
 
+async def _stream_chat_events(client: genai.Client, full_prompt: str, config: types.GenerateContentConfig,
+                              user_id: str, prompt: str):
+    """SSE events for a streamed /chat answer; the full answer is stored in memory before the done event."""
+    parts = []
+    try:
+        async for chunk in await client.aio.models.generate_content_stream(
+            model=MODEL_NAME, contents=full_prompt, config=config
+        ):
+            if chunk.text:
+                parts.append(chunk.text)
+                yield {"data": json.dumps({"text": chunk.text})}
+    except Exception as e:
+        logger.error(f"Chat stream error: {e}")
+        yield {"data": json.dumps({"error": str(e)})}
+        return
+    answer = "".join(parts)
+    conversation_memory.add_message(user_id, "user", prompt)
+    conversation_memory.add_message(user_id, "assistant", answer)
+    yield {"data": json.dumps({"done": True})}
+
 @app.post("/chat")
-async def chat_with_memory(
-    request: ChatRequest,
-    client: genai.Client = Depends(get_client)
-):
+async def chat_with_memory(request: ChatRequest):
     """
     General Ayla Chat endpoint (Floating Widget).
     Includes memory and student context.
     """
+    client = get_client()
     try:
         user_id = request.user_id or "anonymous"
         messages = []
         
         # 1. Add context
         # 1. Fetch Academic Context (DB Primary)
-        try:
-            import uuid as uuid_lib
-            uuid_lib.UUID(user_id)
-            user_uuid = user_id
-        except:
-            user_uuid = username_to_uuid(user_id) if user_id != "anonymous" else None
+        user_uuid = user_id if _UUID_RE.match(user_id) else (username_to_uuid(user_id) if user_id != "anonymous" else None)
 
         academic_context = ""
         if user_uuid:
-            service = AcademicService()
-            academic_context = await service.get_academic_summary(user_uuid)
+            academic_context = await get_academic_context(user_uuid)
             messages.append(academic_context)
 
         # 2. Add Frontend Context (Fallback)
@@ -321,10 +373,10 @@ async def chat_with_memory(
              messages.append(f"Today's Date: {datetime.now().strftime('%A, %B %d, %Y')}")
         
         # 2. Add History
-        history = conversation_memory.get_history(user_id)
-        for msg in history[-10:]:
-            role = "User" if msg['role'] == 'user' else "Ayla"
-            messages.append(f"{role}: {msg['content']}")
+        history_count = conversation_memory.message_count(user_id)
+        transcript = conversation_memory.get_transcript(user_id, 10)
+        if transcript:
+            messages.append(transcript)
         
         # 3. Add Current Message
         messages.append(f"User: {request.prompt}")
@@ -333,14 +385,19 @@ async def chat_with_memory(
         logger.info(f"Chat request from {user_id}")
         
         # Generate
+        config = types.GenerateContentConfig(
+            system_instruction="You are Ayla, a friendly AI assistant for TU Dortmund students. Help with courses, exams, and academic questions. Use LaTeX for math: $\\frac{a}{b}$",
+            max_output_tokens=request.max_tokens,
+            temperature=0.7,
+        )
+        if request.stream:
+            return EventSourceResponse(
+                _stream_chat_events(client, full_prompt, config, user_id, request.prompt)
+            )
         response = await client.aio.models.generate_content(
             model=MODEL_NAME,
             contents=full_prompt,
-            config=types.GenerateContentConfig(
-                system_instruction="You are Ayla, a friendly AI assistant for TU Dortmund students. Help with courses, exams, and academic questions. Use LaTeX for math: $\\frac{a}{b}$",
-                max_output_tokens=request.max_tokens,
-                temperature=0.7,
-            )
+            config=config
         )
         
         answer = response.text
@@ -353,7 +410,7 @@ async def chat_with_memory(
             "result": answer,
             "model": MODEL_NAME,
             "user_id": user_id,
-            "history_count": len(history) + 2
+            "history_count": history_count + 2
         }
         
     except Exception as e:
@@ -364,6 +421,54 @@ async def chat_with_memory(
 # LOGIN / SCRAPER ENDPOINTS
 # ============================================
 
+def fetch_moodle_deadlines(username: str, password: str) -> Dict:
+    """Blocking Moodle scrape on a pooled driver when one is free, otherwise on a fresh one."""
+    from app.scrapers.moodle_scraper import MoodleScraper
+    driver = browser_pool.acquire()
+    scraper = MoodleScraper(username, password, driver=driver)
+    try:
+        return scraper.get_deadlines(close_driver=driver is None)
+    finally:
+        if driver is not None:
+            browser_pool.release(driver)
+
+# ForgeRock REST login of the university IdP; a wrong password is answered with 401 and no browser involved
+SSO_AUTH_URL = os.getenv("SSO_AUTH_URL", "https://sso.itmc.tu-dortmund.de/openam/json/realms/root/authenticate")
+SSO_PROBE_TIMEOUT = 5.0
+
+def _openam_header(value: str) -> str:
+    """Header-safe form of a credential; OpenAM decodes RFC 2047 "=?UTF-8?B?...?=" for non-ASCII values."""
+    if value.isascii():
+        return value
+    return f"=?UTF-8?B?{base64.b64encode(value.encode()).decode()}?="
+
+async def verify_sso(username: str, password: str) -> bool:
+    """Cheap credential check against the SSO before launching any scraper.
+    
+    Returns False only when the IdP explicitly rejects the credentials. Any other
+    outcome (2FA callbacks, network errors, unexpected status) returns True so the
+    scrapers still get to decide; the probe can only speed up a rejection.
+    """
+    if _http_client is None:
+        return True
+    try:
+        resp = await _http_client.post(
+            SSO_AUTH_URL,
+            headers={
+                "X-OpenAM-Username": _openam_header(username),
+                "X-OpenAM-Password": _openam_header(password),
+                "Accept-API-Version": "resource=2.0, protocol=1.0",
+                "Content-Type": "application/json",
+            },
+            content=b"{}",
+            timeout=SSO_PROBE_TIMEOUT,
+        )
+    except Exception as e:
+        # Inconclusive, never fatal: the scrapers still get to decide
+        logger.warning(f"SSO probe failed, falling back to scrapers: {e}")
+        return True
+    return resp.status_code != 401
+
 @app.post("/login")
 async def login(creds: Credentials):
     logger.info(f"Login request for {creds.username}")
@@ -373,19 +478,36 @@ async def login(creds: Credentials):
     
     # Cache key includes password hash to prevent auth bypass
     key = get_cache_key(creds.username, creds.password)
-    if key in user_login_cache:
+    cached = user_login_cache.get(key)
+    if cached is not None:
         logger.info(f"Returning cached login data for {creds.username}")
-        return user_login_cache[key]
+        return cached
     
+    return await coalesce_scrape(("login", key), lambda: _scrape_login(creds, key))
+
+async def _scrape_login(creds: Credentials, key: bytes):
     # Combined Logic: Single browser session for verification and scraping
     moodle_deadlines = []
     current_classes = []
     try:
         logger.info("Verifying credentials and fetching initial data...")
         
-        # 1. Fetch Deadlines (Moodle)
-        moodle_scraper = MoodleScraper(creds.username, creds.password)
-        m_result = moodle_scraper.get_deadlines(close_driver=True)
+        # A rejected password is known in ~100 ms here instead of after a Chrome startup
+        if not await verify_sso(creds.username, creds.password):
+            logger.info(f"SSO rejected credentials for {creds.username}")
+            return {"success": False, "error": "invalid_credentials"}
+        
+        # 1 + 2. Moodle deadlines and LSF classes each drive their own browser; run them side by side
+        from app.scrapers.lsf_scraper import LsfScraper
+        lsf_scraper = LsfScraper(creds.username, creds.password, creds.totp_secret)
+        m_result, l_result = await asyncio.gather(
+            asyncio.to_thread(fetch_moodle_deadlines, creds.username, creds.password),
+            asyncio.to_thread(lsf_scraper.get_current_classes),
+            return_exceptions=True,
+        )
+        for result in (m_result, l_result):
+            if isinstance(result, BaseException):
+                raise result
         
         if m_result.get("success"):
             moodle_deadlines = m_result.get("deadlines", [])
@@ -395,11 +517,6 @@ async def login(creds: Credentials):
                  return {"success": False, "error": "invalid_credentials"}
             logger.warning(f"Moodle fetch failed but continuing: {error_status}")
 
-        # 2. Fetch Current Classes (LSF)
-        # Note: We create a new scraper for LSF to ensure clean navigation, 
-        # though ideally we could reuse the driver if needed for extreme speed.
-        lsf_scraper = LsfScraper(creds.username, creds.password, creds.totp_secret)
-        l_result = lsf_scraper.get_current_classes()
         if l_result.get("success"):
             current_classes = l_result.get("current_classes", [])
             logger.info(f"Fetched {len(current_classes)} current classes from LSF.")
@@ -407,8 +524,7 @@ async def login(creds: Credentials):
         # 3. Persist to Database for AI access
         # If frontend passed a real user_id (Supabase UUID), use it. Fallback to hash only if missing.
         user_uuid = creds.user_id or username_to_uuid(creds.username)
-        service = AcademicService()
-        await service.save_deadlines(user_uuid, moodle_deadlines)
+        persist_in_background(academic_service.save_deadlines(user_uuid, moodle_deadlines), user_uuid)
         # Note: Academic profile is updated in fetch-grades where we have GPA/ECTS
             
     except Exception as e:
@@ -432,6 +548,7 @@ async def login(creds: Credentials):
         }
     }
     user_login_cache[key] = response
+    remember_cache_key(creds.username, key)
     return response
 
 @app.post("/fetch-grades")
@@ -440,12 +557,31 @@ async def fetch_grades(creds: Credentials):
     
     # Cache key includes password hash to prevent auth bypass
     key = get_cache_key(creds.username, creds.password)
-    if not creds.force_refresh and key in user_grades_cache:
+    cached = None if creds.force_refresh else user_grades_cache.get(key)
+    if cached is not None:
         logger.info(f"Returning cached grades data for {creds.username}")
-        return user_grades_cache[key]
-        
+        return cached
+    
+    return await coalesce_scrape(("grades", key), lambda: _scrape_grades(creds, key))
+
+# Scraper grades are plain floats (or None); an exact type test skips isinstance's subclass walk
+_NUMERIC_GRADE_TYPES = (int, float)
+
+@dataclass
+class ExamRow:
+    """One exam_requirements entry; slotted, so no per-row __dict__ is kept in the grades cache."""
+    # Python 3.9 has no dataclass(slots=True), and slots rule out field defaults
+    __slots__ = ("name", "ects", "type", "required", "passed")
+    name: str
+    ects: float
+    type: str
+    required: bool
+    passed: bool
+
+async def _scrape_grades(creds: Credentials, key: bytes):
+    from app.scrapers.boss_scraper import BossScraper
     scraper = BossScraper(creds.username, creds.password, creds.totp_secret)
-    data = scraper.get_data()
+    data = await scraper.get_data_async()
     
     if "error" in data:
         return {"success": False, "error": data["error"]}
@@ -453,46 +589,57 @@ async def fetch_grades(creds: Credentials):
     # Build detailed grades from scraper data
     exams = data.get("exams", [])
     detailed_grades = []
+    exam_requirement_rows = []
     
-    # Collect numeric grades for calculating average and best
-    numeric_grades = []
+    # Running totals for the average and best grade; the rows above already hold every grade
+    grade_sum = 0.0
+    grade_count = 0
+    best_grade = None
     
     for exam in exams:
         grade_val = exam.get("grade")
         credits_val = exam.get("credits", 0)
-        status_val = exam.get("status", "").lower()
+        status = exam.get("status", "")
         
         # Determine if exam is passed:
         # - Grade between 1.0 and 4.0 (German grading: 1.0-4.0 is passing)
         # - Status contains 'bestanden' or 'BE' (passed in German)
-        is_passed = False
-        if grade_val is not None and isinstance(grade_val, (int, float)):
+        # One type check per exam feeds both the pass decision and the grade statistics
+        is_numeric = type(grade_val) in _NUMERIC_GRADE_TYPES
+        if is_numeric:
             is_passed = 1.0 <= grade_val <= 4.0
-        elif "bestanden" in status_val or status_val == "be":
-            is_passed = True
+        else:
+            # Status is only consulted (and lowercased) for exams without a numeric grade
+            status_val = status.lower()
+            is_passed = status_val == "be" or "bestanden" in status_val
         
+        title = exam.get("title", "Unknown")
         detailed_grades.append({
             "id": exam.get("id", ""),
-            "title": exam.get("title", "Unknown"),
+            "title": title,
             "grade": grade_val,
             "credits": credits_val,
             "semester": exam.get("semester", ""),
-            "status": exam.get("status", ""),
+            "status": status,
             "passed": is_passed,
         })
+        exam_requirement_rows.append(ExamRow(title, credits_val, "compulsory", True, is_passed))
         
-        # Collect valid numeric grades (excluding null/None and 0)
-        if grade_val is not None and isinstance(grade_val, (int, float)) and grade_val > 0:
-            numeric_grades.append(float(grade_val))
+        # Count valid numeric grades (excluding null/None and 0)
+        if is_numeric and grade_val > 0:
+            grade_val = float(grade_val)
+            grade_sum += grade_val
+            grade_count += 1
+            # In German grading, lower is better (1.0 is best)
+            if best_grade is None or grade_val < best_grade:
+                best_grade = grade_val
     
-    # Calculate average and best grade
+    # Calculate average grade
     average_grade = None
-    best_grade = None
     
-    if numeric_grades:
-        average_grade = round(sum(numeric_grades) / len(numeric_grades), 2)
-        best_grade = min(numeric_grades)  # In German grading, lower is better (1.0 is best)
-        logger.info(f"Calculated grades - Average: {average_grade}, Best: {best_grade} from {len(numeric_grades)} grades")
+    if grade_count:
+        average_grade = round(grade_sum / grade_count, 2)
+        logger.info(f"Calculated grades - Average: {average_grade}, Best: {best_grade} from {grade_count} grades")
     
     # Get summary data
     summary = data.get("summary", {})
@@ -526,15 +673,7 @@ async def fetch_grades(creds: Credentials):
             "exam_requirements": [
                 {
                     "category": "All Exams",
-                    "exams": [
-                        {
-                            "name": g["title"],
-                            "ects": g["credits"],
-                            "type": "compulsory", # Default
-                            "required": True,
-                            "passed": g["passed"]
-                        } for g in detailed_grades
-                    ]
+                    "exams": exam_requirement_rows
                 }
             ],
             "moodle_deadlines": [],  # Moodle deadlines are merged in login endpoint
@@ -543,11 +682,11 @@ async def fetch_grades(creds: Credentials):
         }
     }
     
-    # Persist to Database
-    service = AcademicService()
-    await service.save_grades(user_uuid, detailed_grades, response["data"]["ects_data"])
+    # Persist to Database (the response doesn't depend on it, so don't wait for the write)
+    persist_in_background(academic_service.save_grades(user_uuid, detailed_grades, response["data"]["ects_data"]), user_uuid)
     
     user_grades_cache[key] = response
+    remember_cache_key(creds.username, key)
     return response
 
 @app.post("/email/fetch")
@@ -592,22 +731,17 @@ async def get_events(user_id: str):
         supabase = await get_supabase()
         
         # Resolve UUID
-        try:
-            import uuid as uuid_lib
-            uuid_lib.UUID(user_id)
-            user_uuid = user_id
-        except:
-            user_uuid = username_to_uuid(user_id) if user_id != "anonymous" else None
+        user_uuid = user_id if _UUID_RE.match(user_id) else (username_to_uuid(user_id) if user_id != "anonymous" else None)
             
         if not user_uuid:
             return {"success": True, "events": []}
             
-        # 1. Fetch Reminders
-        rem_resp = await supabase.table("reminders").select("*").eq("user_id", user_uuid).execute()
+        # 1 + 2. Fetch Reminders and Deadlines; the queries are independent, so overlap them
+        rem_resp, dl_resp = await asyncio.gather(
+            supabase.table("reminders").select("*").eq("user_id", user_uuid).execute(),
+            supabase.table("student_deadlines").select("*").eq("user_id", user_uuid).execute(),
+        )
         reminders = rem_resp.data if rem_resp.data else []
-        
-        # 2. Fetch Deadlines
-        dl_resp = await supabase.table("student_deadlines").select("*").eq("user_id", user_uuid).execute()
         deadlines = dl_resp.data if dl_resp.data else []
         
         # Unify
@@ -658,4 +792,5 @@ async def delete_event(event_id: str):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # One worker on purpose: the login/grades caches, scrape coalescing and chat memory are per process
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
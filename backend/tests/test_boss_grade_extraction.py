@@ -0,0 +1,109 @@
+import unittest
+import os
+import sys
+
+from lxml import html
+
+# Add backend to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.scrapers.boss_scraper import BossScraper, _find_grade_table
+
+MENU = """
+<table><tr><td><a href="?state=sul&amp;menue=n">Prüfungsverwaltung</a></td></tr></table>
+"""
+
+# Trimmed QIS "Notenspiegel": a row without a title (sub-achievement) and an exam that is only registered
+GRADE_PAGE = """
+<html><body>
+""" + MENU + """
+<table class="nb list">
+  <tr><th>Prüfungsnr.</th><th>Prüfungstext</th><th>Semester</th><th>Note</th><th>Status</th><th>ECTS</th></tr>
+  <tr><td>1001</td><td>Mathematik I</td><td>WiSe 22/23</td><td>1,0</td><td>bestanden</td><td>5</td></tr>
+  <tr><td>1002</td><td></td><td>WiSe 22/23</td><td>3,0</td><td>bestanden</td><td>8</td></tr>
+  <tr><td>1003</td><td>Seminar</td><td>SoSe 23</td><td></td><td>angemeldet</td><td>-</td></tr>
+</table>
+</body></html>
+"""
+
+# The last row is QIS's own summary line, which takes precedence over the computed totals
+GRADE_PAGE_WITH_SUMMARY = """
+<table class="nb list">
+  <tr><th>Prüfungsnr.</th><th>Prüfungstext</th><th>Semester</th><th>Note</th><th>Status</th><th>ECTS</th></tr>
+  <tr><td>1001</td><td>Mathematik I</td><td>WiSe 22/23</td><td>1,0</td><td>bestanden</td><td>5</td></tr>
+  <tr><td>1004</td><td>Programmierung</td><td>WiSe 22/23</td><td>2,3</td><td>bestanden</td><td>10</td></tr>
+  <tr><td>9999</td><td>Kontostand</td><td></td><td>1,7</td><td></td><td>120</td></tr>
+</table>
+"""
+
+# Older layout: the header row uses <td> cells, so only the text fallback finds the table
+TD_HEADER_PAGE = """
+<html><body>
+""" + MENU + """
+<table>
+  <tr><td>Prüfungsnr.</td><td>Prüfungstext</td><td>Semester</td><td>Note</td><td>Status</td><td>ECTS</td></tr>
+  <tr><td>1001</td><td>Mathematik I</td><td>WiSe 22/23</td><td>1,0</td><td>bestanden</td><td>5</td></tr>
+  <tr><td>1004</td><td>Programmierung</td><td>WiSe 22/23</td><td>3,0</td><td>bestanden</td><td>10</td></tr>
+</table>
+</body></html>
+"""
+
+SESSION_EXPIRED_PAGE = """
+<html><body>
+<table>
+  <tr><td><a href="?state=sul&amp;menue=n">Prüfungsverwaltung</a></td></tr>
+  <tr><td>Ihre Sitzung ist abgelaufen.</td><td>Bitte melden Sie sich erneut an.</td><td>Exam Administration</td></tr>
+</table>
+</body></html>
+"""
+
+
+class GradeExtractionTests(unittest.TestCase):
+
+    def setUp(self):
+        self.scraper = BossScraper("user", "secret")
+
+    def test_untitled_rows_count_towards_totals(self):
+        exams, summary = self.scraper.extract_grades_from_content(GRADE_PAGE)
+        self.assertEqual([e['title'] for e in exams], ["Mathematik I", "Seminar"])
+        self.assertEqual(exams[0]['grade'], 1.0)
+        self.assertEqual(exams[0]['credits'], 5.0)
+        self.assertIsNone(exams[1]['grade'])
+        self.assertEqual(exams[1]['credits'], 0.0)
+        # Mean of 1,0 and 3,0; credits of both passed rows, titled or not
+        self.assertEqual(summary, {"total_credits": 13.0, "current_gpa": 2.0})
+
+    def test_totals_stay_float_without_passed_rows(self):
+        page = GRADE_PAGE.replace("bestanden", "angemeldet").replace("1,0", "").replace("3,0", "")
+        exams, summary = self.scraper.extract_grades_from_content(page)
+        self.assertEqual(len(exams), 2)
+        self.assertIsInstance(summary["total_credits"], float)
+        self.assertEqual(summary, {"total_credits": 0.0, "current_gpa": 0.0})
+
+    def test_summary_row_overrides_computed_totals(self):
+        exams, summary = self.scraper.extract_grades_from_content(GRADE_PAGE_WITH_SUMMARY)
+        self.assertEqual(len(exams), 3)
+        self.assertEqual(summary, {"total_credits": 120.0, "current_gpa": 1.7})
+
+    def test_td_header_table_uses_default_columns(self):
+        exams, summary = self.scraper.extract_grades_from_content(TD_HEADER_PAGE)
+        by_title = {e['title']: e for e in exams}
+        self.assertEqual(by_title["Programmierung"]['exam_id'], "1004")
+        self.assertEqual(by_title["Programmierung"]['grade'], 3.0)
+        self.assertNotIn("Prüfungsverwaltung", by_title)
+        self.assertEqual(summary, {"total_credits": 10.0, "current_gpa": 3.0})
+
+    def test_menu_page_is_not_a_grade_page(self):
+        """Page validation must not accept a menu or session-expired table."""
+        self.assertEqual(_find_grade_table(html.fromstring(SESSION_EXPIRED_PAGE)), [])
+        self.assertEqual(_find_grade_table(html.fromstring(TD_HEADER_PAGE)), [])
+        self.assertEqual(len(_find_grade_table(html.fromstring(GRADE_PAGE))), 1)
+
+    def test_session_expired_page_yields_no_exams(self):
+        exams, summary = self.scraper.extract_grades_from_content(SESSION_EXPIRED_PAGE)
+        self.assertEqual(exams, [])
+        self.assertEqual(summary, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
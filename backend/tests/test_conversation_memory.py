@@ -0,0 +1,65 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import os
+import sys
+
+# Add backend to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.conversation_memory import ConversationMemory
+
+
+class ConversationMemoryTests(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch('app.services.conversation_memory.datetime')
+        self.mock_datetime = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mock_datetime.now.return_value = datetime(2026, 1, 1, 12, 0)
+        self.memory = ConversationMemory(ttl_hours=1)
+
+    def test_entry_expiring_exactly_now_is_removed(self):
+        """An entry whose expiry equals the current time must be dropped, not re-queued forever."""
+        self.memory.add_message("alice", "user", "hi")
+        self.mock_datetime.now.return_value += timedelta(hours=1)
+        self.assertEqual(self.memory.get_history("alice"), [])
+        self.assertEqual(self.memory._expiry_heap, [])
+
+    def test_access_extends_ttl(self):
+        """Reading a conversation moves its expiry; the stale heap entry is rescheduled, not honoured."""
+        self.memory.add_message("alice", "user", "hi")
+        self.mock_datetime.now.return_value += timedelta(minutes=50)
+        self.assertEqual(len(self.memory.get_history("alice")), 1)
+        self.mock_datetime.now.return_value += timedelta(minutes=50)
+        self.assertEqual(len(self.memory.get_history("alice")), 1)
+        self.mock_datetime.now.return_value += timedelta(hours=1)
+        self.assertEqual(self.memory.get_history("alice"), [])
+
+    def test_only_due_users_expire(self):
+        self.memory.add_message("alice", "user", "hi")
+        self.mock_datetime.now.return_value += timedelta(minutes=30)
+        self.memory.add_message("bob", "user", "hello")
+        self.mock_datetime.now.return_value += timedelta(minutes=45)
+        self.assertEqual(self.memory.get_history("alice"), [])
+        self.assertEqual(self.memory.message_count("bob"), 1)
+
+    def test_message_count_of_expired_conversation_is_zero(self):
+        """The count must agree with the (empty) transcript of a conversation that expired unswept."""
+        self.memory.add_message("alice", "user", "hi")
+        self.mock_datetime.now.return_value += timedelta(hours=2)
+        self.assertEqual(self.memory.message_count("alice"), 0)
+        self.assertEqual(self.memory.get_transcript("alice", 10), "")
+
+    def test_transcript_renders_last_n_messages(self):
+        self.memory.add_message("alice", "user", "one")
+        self.memory.add_message("alice", "assistant", "two")
+        self.memory.add_message("alice", "user", "three")
+        self.assertEqual(self.memory.get_transcript("alice", 2), "Ayla: two\n\nUser: three")
+        # A new message invalidates the rendered transcript
+        self.memory.add_message("alice", "assistant", "four")
+        self.assertEqual(self.memory.get_transcript("alice", 2), "User: three\n\nAyla: four")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+
+# Add backend to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.ttl_cache import ExpiringCache
+
+
+class ExpiringCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch('app.utils.ttl_cache.time')
+        self.mock_time = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mock_time.monotonic.return_value = 1000.0
+        self.cache = ExpiringCache(maxsize=3, ttl=10)
+
+    def test_hit_before_deadline(self):
+        self.cache["a"] = 1
+        self.mock_time.monotonic.return_value += 9.9
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertEqual(self.cache["a"], 1)
+        self.assertIn("a", self.cache)
+
+    def test_entry_expires_at_deadline(self):
+        """An entry is gone once now reaches its deadline, for every accessor."""
+        self.cache["a"] = 1
+        self.mock_time.monotonic.return_value += 10
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.get("a", "default"), "default")
+        self.assertNotIn("a", self.cache)
+        with self.assertRaises(KeyError):
+            self.cache["a"]
+        self.assertIsNone(self.cache.pop("a"))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_rewrite_renews_deadline(self):
+        self.cache["a"] = 1
+        self.mock_time.monotonic.return_value += 8
+        self.cache["a"] = 2
+        self.mock_time.monotonic.return_value += 8
+        self.assertEqual(self.cache.get("a"), 2)
+
+    def test_writes_sweep_expired_entries(self):
+        self.cache["a"] = 1
+        self.mock_time.monotonic.return_value += 5
+        self.cache["b"] = 2
+        self.mock_time.monotonic.return_value += 5
+        self.cache["c"] = 3
+        self.assertEqual(list(self.cache._data), ["b", "c"])
+
+    def test_maxsize_evicts_least_recently_written(self):
+        for key in "abc":
+            self.cache[key] = key
+        self.cache["a"] = "a"  # Renewed, so "b" is now the oldest
+        self.cache["d"] = "d"
+        self.assertNotIn("b", self.cache)
+        self.assertEqual(len(self.cache), 3)
+        for key in "acd":
+            self.assertEqual(self.cache[key], key)
+
+    def test_pop_removes_entry(self):
+        self.cache["a"] = 1
+        self.assertEqual(self.cache.pop("a"), 1)
+        self.assertIsNone(self.cache.pop("a"))
+        self.assertNotIn("a", self.cache)
+
+
+if __name__ == '__main__':
+    unittest.main()